@@ -1,30 +1,52 @@
-#import several libraries need for the program to function.
+#import several libraries need for the program to function. matplotlib and pydst are imported the first time
+#a graph is made or the DST API is used, so importing the file stays fast.
+import os
 import tkinter as tk
 from tkinter import ttk
 import pandas as pd 
 import numpy as np 
 
-import matplotlib
-matplotlib.use("TkAgg")
-from matplotlib import pyplot as plt
-from matplotlib import style
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-import pydst
+from dataproject.dstdata import typedataset, DimensionIndex, PivotCache, MetadataModel
+from dataproject import storage
+from dataproject.catalog import DatasetCatalog, refreshtable
+from dataproject.instrument import ActionProfiler
 
-#set the default language for the DST API
-Dst = pydst.Dst(lang='en')
+#the client for the DST API, created by getdst
+Dst = None
+
+#The function getdst creates the client for the DST API the first time it is called
+def getdst():
+    global Dst
+    if Dst is None:
+        import pydst
+        #set the default language for the DST API
+        Dst = pydst.Dst(lang='en')
+    return Dst
+
+#local catalog of previously fetched tables, stored in the folder the program is running from
+catalog = DatasetCatalog("./catalog")
 
 #Text fonts later referenced in the code
 LARGE_FONT = ("Verdana", 12)
 NORM_FONT = ("Verdana",9)
 SMALL_FONT = ("Verdana",8)
 
+#Settings for the timing of the user actions. Set PROFILEFOLDER to a folder to dump the cProfile output of every action,
+#and TRACEPATH to a path to write a json trace of the actions, which can be opened in chrome://tracing. The defaults are
+#read from the environment variables NOKIASNAKE_PROFILEFOLDER and NOKIASNAKE_TRACEPATH
+PROFILEFOLDER = os.environ.get("NOKIASNAKE_PROFILEFOLDER")
+TRACEPATH = os.environ.get("NOKIASNAKE_TRACEPATH")
+
+#the profiler times every user action and splits it into network, parse, transform, io and render phases. The summary
+#of the last action is shown in the status bar of the app. The settings above are applied when the app is created
+profiler = ActionProfiler()
+
 #We create several global variables which will be referenced and changed.
-metadatadictionary = {}
-apidictionary = {}
+metadatamodel = None
 tableid = "empty"
 dataset = pd.DataFrame
+datasetindex = None
+pivotcache = None
 datasetpivot = pd.DataFrame
 
 #We create the main class, which defines the container in which all frames are defined. Think of it as the app itself.
@@ -37,6 +59,13 @@ class NokiaSnakeClient(tk.Tk):
         #We set title for the app frame
         tk.Tk.wm_title(self, "NokiaSnake client")
 
+        #the status bar at the bottom of the app shows the time spent on the last action
+        self.statusbar = tk.Label(self, text="", font=SMALL_FONT, anchor="w", relief=tk.SUNKEN)
+        self.statusbar.pack(side = "bottom", fill = "x")
+        profiler.listener = lambda record: self.statusbar.config(text=profiler.summary(record))
+        profiler.profilefolder = PROFILEFOLDER
+        profiler.tracepath = TRACEPATH
+
         #defining the container later used to create the frames in the app
         container = tk.Frame(self)
         container.pack(side = "top", fill = "both", expand = True)
@@ -62,14 +91,16 @@ class NokiaSnakeClient(tk.Tk):
     
     #The clearall function resets all global variables to their default value and shows the frame defined in the "cont" argument
     def clearall(self, cont):
-        global metadatadictionary
-        metadatadictionary = {} 
-        global apidictionary
-        apidictionary = {}
+        global metadatamodel
+        metadatamodel = None
         global tableid
         tableid = "empty"
         global dataset
         dataset = pd.DataFrame
+        global datasetindex
+        datasetindex = None
+        global pivotcache
+        pivotcache = None
         global datasetpivot
         datasetpivot = pd.DataFrame
 
@@ -109,10 +140,23 @@ class PageOne(tk.Frame):
 
         #We define the function loaddataset, which depending on the menubutton selected raises either the default dataset
         #or the window for custom dataset
+        @profiler.timedaction("LoadDataset")
         def LoadDataset():
             if menuvariable.get()==0:
                 global dataset
-                dataset = Dst.get_data(table_id = "NAN1", variables={'TRANSAKT': ["*"], 'PRISENHED': ["*"], 'Tid': ["*"]}, lang="en")
+                #NAN1 is stored in the catalog. Only the periods which are not stored yet are fetched from the api, and
+                #a NAN1 table stored from the custom dataset page with other variables is fetched again. The values and
+                #dimension columns are converted once, when the data is fetched
+                nan1variables = {'TRANSAKT': ["*"], 'PRISENHED': ["*"], 'Tid': ["*"]}
+                dataset, fetchedperiods = refreshtable(catalog, profiler.timedobject(getdst(), "network"), "NAN1", nan1variables,
+                                                       transform=profiler.timedfunction(typedataset, "parse"))
+
+                #build the index used to slice the dataset on PageThree, and the cache used to build datasetpivot incrementally
+                with profiler.phase("transform"):
+                    global datasetindex
+                    datasetindex = DimensionIndex(dataset)
+                    global pivotcache
+                    pivotcache = PivotCache(datasetindex)
 
             else:
                 popupmsg()
@@ -137,6 +181,7 @@ class PageOne(tk.Frame):
 
             #we define the function loadcustomdata. The function takes the text from the entry field tries to use it
             #for the DST api to retrieve metadata about a table.
+            @profiler.timedaction("loadcustomdata")
             def loadcustomdata():
                 #we call global in order to save the changes to the variable.           
                 global tableid
@@ -145,23 +190,13 @@ class PageOne(tk.Frame):
 
                 #We try to run tableid in the API
                 try:
-                    #we pull metadata from the api and create the list text which contains the category titles
-                    data = Dst.get_variables(table_id=tableid)
-                    categories = list(data["text"])
-                    
-                    #The for loop access the metadata from the api and appends the found information to the metadatadictionary
-                    #and the apidictionary
-                    for title in categories:
-                        dataframe = data.loc[data["text"] == title,"values"]
-                        data_list = list(dataframe)
-                        dict_list = []
-                        for sublist in data_list:
-                            for dic in sublist:
-                                dict_list.append(dic)
-                        metadatadictionary.update({title: dict_list})
-                    for title in categories:
-                        api_id = data.loc[data["text"]== title, "id"].item()
-                        apidictionary.update({title: api_id})
+                    #we pull metadata from the api and build the metadatamodel, which indexes the values of every
+                    #variable by their id
+                    global metadatamodel
+                    with profiler.phase("network"):
+                        variables = getdst().get_variables(table_id=tableid)
+                    with profiler.phase("parse"):
+                        metadatamodel = MetadataModel(variables)
                     
                     #close the window
                     popup.destroy()
@@ -197,77 +232,82 @@ class PageTwo(tk.Frame):
         clearallbutton.place(x=20, y=650)
 
         #we define the function getdataset. The function retrives the data set specified by the checkbox lists on the page.
+        @profiler.timedaction("getdataset")
         def getdataset():
-            selectedvariables = {}
-
-            #the for loop uses the information stored in the selectedbutton dictionary to create the selectedvariables dictionary
-            #through reference to the metadatadictionary and apidictionary
-            for header, elist in metadatadictionary.items():
-                list1 = []
-                for key in selectedbutton:
-                    if selectedbutton[key].get():
-                        list1.append(key)
-                list2 = []
-                for dic in elist:
-                    if dic["text"] in list1:
-                        list2.append(dic["id"])
-                if list2 != []:
-                    selectedvariables.update({str(apidictionary[header]): list2})   
+            #the selected positions in the checkbox list of each variable are mapped to value ids by the metadatamodel
+            with profiler.phase("transform"):
+                selectedvariables = metadatamodel.query({variableid: checkboxlist.selected for variableid, checkboxlist in checkboxlists.items()})
 
             #We call global to change the dataset dataframe. 
             global dataset
-            dataset = Dst.get_data(table_id=tableid, variables = selectedvariables)
+            #the dataset is stored in the catalog. If the table is already stored with the same selection of the other
+            #variables, only the time periods which are not stored yet are fetched from the api
+            #the api calls are timed as the network phase and the conversion of the fetched data as the parse phase
+            table, fetchedperiods = refreshtable(catalog, profiler.timedobject(getdst(), "network"), tableid, selectedvariables,
+                                                 transform=profiler.timedfunction(typedataset, "parse"))
+            #the table can hold periods fetched earlier, so only the selected periods are read. The TID column holds
+            #the id or the text of a period, depending on the language of the api
+            with profiler.phase("io"):
+                if "Tid" in selectedvariables:
+                    periods = set(selectedvariables["Tid"])
+                    labels = [value["text"] for value in metadatamodel.values["Tid"] if value["id"] in periods]
+                    dataset = table.select("TID", list(periods)+labels)
+                else:
+                    dataset = table.read()
         
         #button which runs the getdataset function
         getdatabutton = ttk.Button(self, text = "Get Data", command = getdataset)
         getdatabutton.place(x=600,y=650)
         
-        #We define a function to save the dataset as an xlsx file in the folder the program is running from
+        #we create a dropdown menu to choose the file format used to save the dataset. Parquet and feather
+        #keep the dtypes of the dataset and are much faster than xlsx
+        fileformats = ["parquet", "feather", "xlsx"]
+        fileformatvariable = tk.StringVar()
+        fileformatvariable.set(fileformats[0])
+        fileformatmenu = tk.OptionMenu(self, fileformatvariable, *fileformats)
+        fileformatmenu.place(x=800,y=665)
+
+        #We define a function to save the dataset in the chosen format in the folder the program is running from
+        @profiler.timedaction("savedataset")
         def savedataset():
-            savepath = "./"+str(tableid)+".xlsx"
-            dataset.to_excel(savepath, sheet_name="Sheet1")
+            savepath = "./"+str(tableid)+"."+fileformatvariable.get()
+            with profiler.phase("io"):
+                storage.savedataset(dataset, savepath, compression="zstd" if fileformatvariable.get()=="parquet" else None)
 
         #button which runs the savedataset function
         savedatabutton = ttk.Button(self, text = "Save Data", command = savedataset)
         savedatabutton.place(x=600,y=680)
+
         
-        #We define the dictionary selectedbutton, which we will populate with the generate function
-        selectedbutton = {}
+        #We define the dictionary checkboxlists, which we will populate with the generate function. The lists are
+        #keyed by variable id
+        checkboxlists = {}
         
-        #The generate function generates several interior frames on the page, which contains lists of checkboxes.
-        #The id on the buttons are added to the selectedbutton dictionary when the button is pressed.
+        #The generate function generates several checkbox lists on the page, one for each variable in the metadatamodel.
+        #The lists are created with the VirtualCheckList class, which keeps track of the selected values.
+        @profiler.timedaction("generate")
         def generate():
-            for index, header in enumerate(metadatadictionary):
+            checkboxlists.clear()
+            with profiler.phase("render"):
+                for index, variableid in enumerate(metadatamodel.ids):
                 
-                #the if has no purpose but to help place the generated frames on the row below, when more than 4 frames
-                #are generated. The functions in if/else are identical except the .place(x,y)
-                if index > 3:
-                    
-                    #create a label for the list frame
-                    label = tk.Label(self, text = header, font = SMALL_FONT)
-                    label.place(x=50+290*(index-4), y=360)
+                    #the first 4 lists are placed on the top row, and the rest are placed on the row below
+                    if index > 3:
+                        x, y = 50+290*(index-4), 360
+                    else:
+                        x, y = 50+290*index, 80
 
-                    #create the list frame from the ScrollableFrame class, which is defined later.
-                    checkboxlist_index = ScrollableFrame(self)
-                    checkboxlist_index.place(x=50+290*(index-4), y=380)
+                    #create a label for the list frame
+                    label = tk.Label(self, text = metadatamodel.texts[variableid], font = SMALL_FONT)
+                    label.place(x=x, y=y)
 
-                    #for loop is used to populate the list frame with checkboxes.
-                    for index, value in enumerate(metadatadictionary[header]):
-                        is_selected = tk.BooleanVar()
-                        ttk.Checkbutton(checkboxlist_index.interior, text=value["text"], variable=is_selected).grid(row=index,column=0,sticky="W")
-                        selectedbutton[value["text"]] = is_selected
+                    #create the checkbox list from the VirtualCheckList class, which is defined later.
+                    checkboxlist_index = VirtualCheckList(self, metadatamodel.labels(variableid))
+                    checkboxlist_index.place(x=x, y=y+20)
+                    checkboxlists[variableid] = checkboxlist_index
 
-                #See the if explanation
-                else:
-                    label = tk.Label(self, text = header, font = SMALL_FONT)
-                    label.place(x=50+290*index, y=80)
-                    checkboxlist_index = ScrollableFrame(self)
-                    checkboxlist_index.place(x=50+290*index,y=100)
-
-                    for index, value in enumerate(metadatadictionary[header]):
-                        is_selected = tk.BooleanVar()
-                        ttk.Checkbutton(checkboxlist_index.interior, text=value["text"], variable=is_selected).grid(row=index,column=0,sticky="W")
-                        selectedbutton[value["text"]] = is_selected
+                #the layout of the new widgets is computed inside the render phase
+                self.update_idletasks()
         
         #button which runs the generate function
         button3 = ttk.Button(self, text = "generate lists", command = generate)
@@ -300,6 +340,7 @@ class PageThree(tk.Frame):
         
         #This generate function acts as the last. We create 2 frames and populate one with radiobuttons and the other with
         #checkboxes.
+        @profiler.timedaction("generate2")
         def generate2():
 
             #label for the frame
@@ -340,14 +381,16 @@ class PageThree(tk.Frame):
         text = tk.Text(textwindow.interior)
         text.pack()
         
+        #dictionary with the text tag of the statistics shown for each transaction, and the pivotcache they were taken from
+        statstags = {}
+        shownstats = {"cache": None}
+
         #the function slicedata changes the NAN1 dataset based on the buttons pressed.
+        @profiler.timedaction("slicedata")
         def slicedata():
 
             #we access the global variable
             global datasetpivot
-
-            #We reset the dataset datasetpivot, so we can run the function multiple times without saving the previous version
-            datasetpivot = pd.DataFrame
             
             #we generate a list based on the checkbuttons pressed in the transaction frame
             rows = []
@@ -355,25 +398,40 @@ class PageThree(tk.Frame):
                 if selected[key].get()==True:
                     rows.append(key)
 
-            #based on the list rows and the buttonvariable from the price frame, we slice the dataset
-            datasetsort = dataset.loc[dataset["TRANSAKT"].isin(rows)]
-            datasetsort1 = datasetsort[datasetsort["PRISENHED"]==buttonvariable.get()]
-
-            #the dataset naturally have the value row as strings when loading from the api. We change it back to integers
-            datasetsort1["INDHOLD"]=pd.to_numeric(datasetsort1["INDHOLD"], errors="coerce")
-            
-            #We remove rows containing NaN in the value column.
-            datasetsort1.dropna(inplace=True)
-
-            #we create the datasetpivot as a wide dataframe
-            datasetpivot = datasetsort1.pivot(index="TID", columns="TRANSAKT", values = "INDHOLD")
-
-            #We clear the textbox frame
-            text.delete('1.0', tk.END)
-
-            #and then add some statistics about datasetpivot
-            for column in datasetpivot:
-                text.insert(tk.END, datasetpivot[column].describe())
+            #the pivotcache only adds or removes the transactions which changed since the last slice. Each transaction
+            #is sliced through the datasetindex once, and its time series and statistics are kept for later slices
+            with profiler.phase("transform"):
+                added, removed = pivotcache.update(buttonvariable.get(), rows)
+                datasetpivot = pivotcache.pivot
+
+                #the statistics of the added transactions are computed before they are shown
+                addedstats = {key: pivotcache.getstatistics(buttonvariable.get(), key) for key in added}
+
+            with profiler.phase("render"):
+                showstatistics(added, removed, addedstats)
+
+        #the function showstatistics updates the textbox with the statistics of the added and removed transactions
+        def showstatistics(added, removed, addedstats):
+
+            #We clear the textbox frame if it shows statistics from a previously loaded dataset
+            if shownstats["cache"] is not pivotcache:
+                text.delete('1.0', tk.END)
+                statstags.clear()
+                shownstats["cache"] = pivotcache
+
+            #we remove the statistics of the removed transactions
+            for key in removed:
+                tag = statstags.pop(key)
+                text.delete(tag+".first", tag+".last")
+                text.tag_delete(tag)
+
+            #and then add statistics for the added transactions
+            for key in added:
+                tag = "stats"+str(len(statstags))
+                while tag in text.tag_names():
+                    tag = tag+"_"
+                statstags[key] = tag
+                text.insert(tk.END, addedstats[key]+"\n", (tag,))
             textwindow.set_scrollregion()
 
         #the slicebutton runs the slicedata function 
@@ -391,29 +449,38 @@ class PageThree(tk.Frame):
         graphmenu = tk.OptionMenu(self, graphmenuvariable, *graphtypes)
         graphmenu.place(x=900,y=100)
 
-        #The function makegraph produces a graph corresponding to your choice in the graphmenu
+        #The function makegraph produces a graph corresponding to your choice in the graphmenu. The plot is timed as
+        #an action, while the time the graph window is open is not
         def makegraph():
-            #if line was chosen, create line plot
-            if graphmenuvariable.get()=="line":
-                datasetpivot.plot(kind="line")
-                plt.ylabel(buttonvariable.get())
-                plt.xlabel("Time")
-                plt.show()
-
-            #elif stacked area  was chosen, create stacked area plot
-            elif graphmenuvariable.get()=="stacked area":
-                datasetpivot.plot.area()
-                plt.ylabel(buttonvariable.get())
-                plt.xlabel("Time")
-                plt.show()
-
-            #elif percent stacked area was chosen, create such a plot
-            elif graphmenuvariable.get()=="pct. stacked area":
-                datasetpivot_pct = datasetpivot.divide(datasetpivot.sum(axis=1), axis=0)
-                datasetpivot_pct.plot.area()
-                plt.ylabel("percent")
-                plt.xlabel("Time")
-                plt.show()      
+            from matplotlib import pyplot as plt
+
+            with profiler.action("makegraph"):
+                #if line was chosen, create line plot
+                if graphmenuvariable.get()=="line":
+                    with profiler.phase("render"):
+                        datasetpivot.plot(kind="line")
+                        plt.ylabel(buttonvariable.get())
+
+                #elif stacked area  was chosen, create stacked area plot
+                elif graphmenuvariable.get()=="stacked area":
+                    with profiler.phase("render"):
+                        datasetpivot.plot.area()
+                        plt.ylabel(buttonvariable.get())
+
+                #elif percent stacked area was chosen, create such a plot
+                elif graphmenuvariable.get()=="pct. stacked area":
+                    with profiler.phase("transform"):
+                        datasetpivot_pct = datasetpivot.divide(datasetpivot.sum(axis=1), axis=0)
+                    with profiler.phase("render"):
+                        datasetpivot_pct.plot.area()
+                        plt.ylabel("percent")
+
+                #draw the figure inside the render phase
+                with profiler.phase("render"):
+                    plt.xlabel("Time")
+                    plt.gcf().canvas.draw()
+
+            plt.show()
               
         #Create a button to run the makegraph function and create some beatiful graphs
         button = ttk.Button(self, text="Make Graph", command=makegraph)
@@ -452,12 +519,109 @@ class ScrollableFrame(tk.Frame):
         self.canvas.configure(scrollregion=self.canvas.bbox("all"))
 
 
+#The class VirtualCheckList creates a list of checkboxes with a scrollbar and a filter entry. Only the checkboxes visible
+#in the frame are created, and they are reused when the list is scrolled, so lists with thousands of values open instantly.
+class VirtualCheckList(tk.Frame):
+    def __init__(self, master, items, height=220, width=200, rowheight=22, **kwargs):
+        tk.Frame.__init__(self, master, **kwargs)
+
+        #the labels in the list, the positions of the labels matching the filter and the selected positions
+        self.items = list(items)
+        self.filtered = list(range(len(self.items)))
+        self.selected = set()
+
+        #the position in self.filtered of the first visible row
+        self.offset = 0
+        self.visiblerows = max(1, height//rowheight)
+
+        #create the filter entry. The list is filtered every time the text changes
+        self.filtervariable = tk.StringVar()
+        self.filtervariable.trace_add("write", lambda *args: self.setfilter(self.filtervariable.get()))
+        self.filterentry = tk.Entry(self, textvariable=self.filtervariable)
+        self.filterentry.grid(row=0, column=0, columnspan=2, sticky="we")
+
+        #create the frame containing the rows and the vertical scrollbar
+        self.rowframe = tk.Frame(self, width=width, height=height)
+        self.rowframe.grid_propagate(False)
+        self.rowframe.grid(row=1, column=0, sticky="nsew")
+        self.vscrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self._onscroll)
+        self.vscrollbar.grid(row=1, column=1, sticky="ns")
+
+        #create the checkboxes for the visible rows. Each row has its own variable, which is updated when the row shows
+        #another label
+        self.rowvariables = []
+        self.rowbuttons = []
+        for row in range(self.visiblerows):
+            is_selected = tk.BooleanVar()
+            button = ttk.Checkbutton(self.rowframe, variable=is_selected, command=lambda row=row: self._ontoggle(row))
+            button.grid(row=row, column=0, sticky="W")
+            self.rowvariables.append(is_selected)
+            self.rowbuttons.append(button)
+
+        #scrolling with the mouse wheel
+        for widget in [self.rowframe] + self.rowbuttons:
+            widget.bind("<MouseWheel>", lambda event: self._scrollto(self.offset - int(event.delta/abs(event.delta or 1))))
+            widget.bind("<Button-4>", lambda event: self._scrollto(self.offset-1))
+            widget.bind("<Button-5>", lambda event: self._scrollto(self.offset+1))
+
+        self._render()
+
+    #setfilter only shows the labels containing the text, regardless of case
+    def setfilter(self, text):
+        text = text.lower()
+        self.filtered = [index for index, item in enumerate(self.items) if text in str(item).lower()]
+        self._scrollto(0)
+
+    def _ontoggle(self, row):
+        #Private method. Saves the state of the toggled checkbox in self.selected
+        index = self.filtered[self.offset+row]
+        if self.rowvariables[row].get():
+            self.selected.add(index)
+        else:
+            self.selected.discard(index)
+
+    def _onscroll(self, *args):
+        #Private method. Called by the scrollbar with either ("moveto", fraction) or ("scroll", number, what)
+        if args[0] == "moveto":
+            self._scrollto(int(float(args[1])*len(self.filtered)))
+        elif args[0] == "scroll":
+            step = int(args[1])*(self.visiblerows if args[2] == "pages" else 1)
+            self._scrollto(self.offset+step)
+
+    def _scrollto(self, offset):
+        #Private method. Moves the first visible row to offset and updates the rows
+        self.offset = max(0, min(offset, len(self.filtered)-self.visiblerows))
+        self._render()
+
+    def _render(self):
+        #Private method. Shows the labels from self.offset in the reused checkboxes
+        for row, button in enumerate(self.rowbuttons):
+            position = self.offset+row
+            if position < len(self.filtered):
+                index = self.filtered[position]
+                button.configure(text=self.items[index])
+                self.rowvariables[row].set(index in self.selected)
+                button.grid()
+            else:
+                button.grid_remove()
+
+        #update the scrollbar to show the visible part of the list
+        if len(self.filtered) > 0:
+            self.vscrollbar.set(self.offset/len(self.filtered), min(1, (self.offset+self.visiblerows)/len(self.filtered)))
+        else:
+            self.vscrollbar.set(0, 1)
+
+
 #We define the class graphwindow, which creates a window with graphs. 
 #The class is not implemented in the app itself yet. You can find similiraties between the class and the makegraph()
 #function on PageThree
 class graphwindow(tk.Tk):
     def __init__(self, data, x, y, y2, graphnames, *args, **kwargs):
         tk.Tk.__init__(self, *args, **kwargs)
+
+        #import the figure and canvas libraries
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
         
         #we create a figure and add subplots
         fig = Figure()
@@ -533,6 +697,10 @@ class graphwindow(tk.Tk):
 #In order to prevent the entire app from running when you import it in other files. The app only opens if you run this file
 if __name__ == "__main__":
 
+    #the graphs made on PageThree are shown in tk windows
+    import matplotlib
+    matplotlib.use("TkAgg")
+
     #we set the NokiaSnakeClient class as our app. We adjust the default size 
     #and run it with mainloop
     app = NokiaSnakeClient()
@@ -1,13 +1,10 @@
-#importing necessary libraries.
-import tkinter as tk
-import pandas as pd
+#importing necessary libraries. The tkinter and matplotlib modules are imported when a window or figure is
+#created, so the module can be imported on machines without a display, e.g. by the exportfigures worker processes.
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import matplotlib
-matplotlib.use("TkAgg")
-from matplotlib import pyplot as plt
-from matplotlib import style
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
 class DataPlotter:
     """Creates a figure with subplots"""
@@ -21,14 +18,39 @@ class DataPlotter:
 
         self.fig = figure
         self.subplots = {}
+
+        #preallocated panels created with setlayout, the artists of each subplot and their x values
+        self.panels = []
+        self.artists = {}
+        self.xvalues = {}
+
+    def setlayout(self, nrows, ncols=1, sharex=True):
+        """Clears the figure and preallocates a grid of panels. The add*plot methods draw in a
+        panel when called with its number.
+
+        Args:
+            nrows (int): number of rows of panels
+            ncols (int): number of columns of panels. Default 1
+            sharex (bool): share the horizontal axis between the panels. Default True
+        """
+
+        self.clearplots()
+        self.panels = list(self.fig.subplots(nrows, ncols, sharex=sharex, squeeze=False).ravel())
+
+    def _getaxis(self, panel):
+        #Private method. Returns the preallocated panel, or a new subplot filling the figure if panel is None
+        if panel == None:
+            return self.fig.add_subplot(1,1,1)
+        return self.panels[panel]
     
-    def addlineplot(self,data,plotname,**kwargs):
+    def addlineplot(self,data,plotname,panel=None,**kwargs):
         """Creates a line subplot for the dataplotter figure based on the data. 1st column
         on horizontal axis, 2nd column on the vertical axis. 
 
         Args:
             data (Pandas DataFrame): 2-column dataframe. 
             plotname (String): Name for the subplot
+            panel (int): number of the panel from setlayout to draw in. Default None
             **kwargs: kwargs for the pyplot.plot method used to construct the subplot.
         """
 
@@ -38,8 +60,8 @@ class DataPlotter:
         yaxisname = axiskeys[1]
 
         #Construct the line subplot 
-        currentplot = self.fig.add_subplot(1,1,1)
-        currentplot.plot(data[xaxisname],data[yaxisname], **kwargs)
+        currentplot = self._getaxis(panel)
+        line, = currentplot.plot(data[xaxisname],data[yaxisname], **kwargs)
         currentplot.set_xlabel(xaxisname)
         currentplot.set_ylabel(yaxisname)
         currentplot.grid(True)
@@ -47,6 +69,8 @@ class DataPlotter:
 
         #Add the subplot to the subplot dictionary in __init__
         self.subplots[plotname]=currentplot
+        self.artists[plotname]=(line, "line")
+        self.xvalues[plotname]=list(data[xaxisname])
     
     def addtwinxlineplot(self, data, plotname, color="b"):
         """Create a line subplot on the secondary y-axis in the DataPlotter figure.
@@ -71,13 +95,14 @@ class DataPlotter:
         #Add the subplot to the subplot dictionary
         self.subplots[plotname+"twinx"]=currentplot
 
-    def addbarplot(self,data,plotname, color="g"):
+    def addbarplot(self,data,plotname, color="g", panel=None):
         """Create a bar subplot in the DataPlotter figure.
 
         Args:
             data (Pandas DataFrame): 2-column dataframe. 
             plotname (String): Name for the subplot
             color (string): Color of lineplot. Default g
+            panel (int): number of the panel from setlayout to draw in. Default None
         """
 
         #Assign column name as variable
@@ -86,44 +111,81 @@ class DataPlotter:
         yaxisname = axiskeys[1]
 
         #Construct the bar plot 
-        currentplot = self.fig.add_subplot(1,1,1)
-        currentplot.bar(data[xaxisname],data[yaxisname],color=color)
+        currentplot = self._getaxis(panel)
+        bars = currentplot.bar(data[xaxisname],data[yaxisname],color=color)
         currentplot.set_xlabel(xaxisname)
         currentplot.set_ylabel(yaxisname)
 
         #Add the subplot to the subplot dictionary
         self.subplots[plotname]=currentplot
+        self.artists[plotname]=(bars, "bar")
+        self.xvalues[plotname]=list(data[xaxisname])
     
-    def addsplitbarplot(self,data,plotname):
-        """Create a custom bar subplot in the DataPlotter figure.
+    def addsplitbarplot(self,data,plotname,panel=None):
+        """Create a custom bar subplot in the DataPlotter figure. Positive values are green
+        and negative values are red.
 
         Args:
             data (Pandas DataFrame): 2-column dataframe. 
             plotname (String): Name for the subplot
+            panel (int): number of the panel from setlayout to draw in. Default None
         """
         #Assign column name as variable
         axiskeys = data.keys()
         xaxisname = axiskeys[0]
         yaxisname = axiskeys[1]
-        
-        #split data[yaxisname] into two new dataframes.
-        positive = data[yaxisname].copy()
-        negative = data[yaxisname].copy()
-
-        #Create NaN values based on criteria
-        positive[positive<=0] = np.nan
-        negative[negative> 0] = np.nan
-
-        #Construct two bar plots based on the split data sets 
-        currentplot = self.fig.add_subplot(1,1,1)
-        currentplot.bar(data[xaxisname],positive,color="g")
-        currentplot.bar(data[xaxisname],negative,color="r")
+
+        #Construct a single bar plot, colored by the sign of the values
+        currentplot = self._getaxis(panel)
+        yvalues = data[yaxisname].to_numpy(dtype=float)
+        bars = currentplot.bar(data[xaxisname],yvalues,color=np.where(yvalues>0,"g","r"))
         currentplot.set_xlabel(xaxisname)
         currentplot.set_ylabel(yaxisname)
         currentplot.axhline(y=0,color="k")
         
         #add the subplot to the subplot dictionary
         self.subplots[plotname]=currentplot
+        self.artists[plotname]=(bars, "splitbar")
+        self.xvalues[plotname]=list(data[xaxisname])
+
+    def updateplot(self, data, plotname):
+        """Updates the values of a line, bar or split bar subplot in place. The subplot is only
+        updated if the x values are unchanged.
+
+        Args:
+            data (Pandas DataFrame): 2-column dataframe. 
+            plotname (String): Name for the subplot
+
+        Returns:
+            updated (bool): True if the subplot was updated, False if it must be created again
+        """
+        #Assign column name as variable
+        axiskeys = data.keys()
+        xaxisname = axiskeys[0]
+        yaxisname = axiskeys[1]
+
+        #the subplot must be created again if the x values changed
+        if plotname not in self.artists or self.xvalues[plotname] != list(data[xaxisname]):
+            return False
+
+        yvalues = data[yaxisname].to_numpy(dtype=float)
+        artist, kind = self.artists[plotname]
+
+        #update the line data, or the bar heights and the colors of split bars
+        if kind == "line":
+            artist.set_ydata(yvalues)
+        else:
+            for bar, height in zip(artist.patches, yvalues):
+                bar.set_height(0 if np.isnan(height) else height)
+                if kind == "splitbar":
+                    bar.set_color("g" if height>0 else "r")
+
+        #rescale the vertical axis to the new values
+        currentplot = self.subplots[plotname]
+        currentplot.relim()
+        currentplot.autoscale_view(scalex=False)
+
+        return True
 
     def figuretitle(self, figuretitle):
         """Sets the figure title
@@ -136,27 +198,143 @@ class DataPlotter:
 
     def clearplots(self):
         """Clear the figure and subplots"""
-        #clearing figure and subplot dictionary
+        #clearing figure, subplot dictionary, panels and artists
         self.fig.clear()
         self.subplots.clear()
+        self.panels = []
+        self.artists.clear()
+        self.xvalues.clear()
+
+
+
+def drawslice(plotter, data, graphtype, xvariable, yvariablelist):
+    """Adds the subplots for a graphtype to a DataPlotter
+
+    Args:
+        plotter (DataPlotter): DataPlotter to add the subplots to
+        data (Pandas DataFrame): Dataframe containing a single slice of the data
+        graphtype (string): graph type used to plot data. options = ("Standard", "Panels")
+        xvariable (string): name of column used as x variable in plot
+        yvariablelist (list of strings): name/s of column/s used as y variable/s in plot. Max 3 entries for "Standard"
+    """
+
+    #create a shared-x panel for each y variable. The first is a split bar plot and the rest are line plots
+    if graphtype=="Panels":
+        plotter.setlayout(len(yvariablelist), sharex=True)
+        plotter.addsplitbarplot(data[[xvariable, yvariablelist[0]]],"panel1",panel=0)
+        for index, yvariable in enumerate(yvariablelist[1:]):
+            plotter.addlineplot(data[[xvariable, yvariable]],"panel"+str(index+2),panel=index+1,color="b")
+
+    #create standard plot
+    if graphtype=="Standard":
+        plotter.addsplitbarplot(data[[xvariable, yvariablelist[0]]],"plot1")
+
+        if len(yvariablelist)>1:
+            plotter.addtwinxlineplot(data[[xvariable, yvariablelist[1]]],"plot1")
+
+        if len(yvariablelist)>2:
+            plotter.addtwinxlineplot(data[[xvariable, yvariablelist[2]]],"plot1",color="r")
 
 
+def updateslice(plotter, data, graphtype, xvariable, yvariablelist):
+    """Updates the subplots drawn by drawslice in place with a new slice of the data. Only the
+    "Panels" graphtype is updated in place.
+
+    Args:
+        plotter (DataPlotter): DataPlotter containing the subplots
+        data (Pandas DataFrame): Dataframe containing a single slice of the data
+        graphtype (string): graph type used to plot data. options = ("Standard", "Panels")
+        xvariable (string): name of column used as x variable in plot
+        yvariablelist (list of strings): name/s of column/s used as y variable/s in plot
+
+    Returns:
+        updated (bool): True if the subplots were updated, False if they must be drawn again with drawslice
+    """
+
+    if graphtype!="Panels" or len(plotter.panels)!=len(yvariablelist):
+        return False
+
+    #update every panel, stopping at the first which can not be updated
+    for index, yvariable in enumerate(yvariablelist):
+        if not plotter.updateplot(data[[xvariable, yvariable]], "panel"+str(index+1)):
+            return False
+
+    return True
+
+
+def _exportslice(task):
+    #Private function. Renders a single slice with the Agg backend and saves it. Runs in the worker processes of exportfigures
+    graphnamekey, data, graphtype, xvariable, yvariablelist, path, figsize, dpi = task
+
+    #the Agg canvas renders the figure without a display
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    plotter = DataPlotter(figure)
+    plotter.figuretitle(graphnamekey)
+    drawslice(plotter, data, graphtype, xvariable, yvariablelist)
+    figure.savefig(path)
+
+    return path
+
+
+def exportfigures(data, slicename, graphtype, folder, xvariable=None, yvariablelist=None, fileformat="png",
+                  processes=None, figsize=(12.8, 7.2), dpi=100):
+    """Saves a figure for every slicekey without opening a window. The figures are rendered in parallel
+    worker processes with the same layouts as PlotterWindow.
+
+    Args:
+        data (Pandas Dataframe): Dataframe used to create the plots
+        slicename (string): name of column used to get slicekeys
+        graphtype (string): graph type used to plot data. options = ("Standard", "Panels")
+        folder (string): folder the figures are saved in. Created if it does not exist
+
+        xvariable (string): name of column used as x variable in plot. Default None
+        yvariablelist (list of strings): name/s of column/s used as y variable/s in plot. Max 3 entries for "Standard". Default None
+        fileformat (string): file format of the figures. Default "png". options = ("png", "svg", "pdf")
+        processes (int): number of worker processes. Default None uses every cpu
+        figsize (tuple): size of the figures in inches. Default (12.8, 7.2)
+        dpi (int): resolution of the figures. Default 100
+
+    Returns:
+        paths (list of strings): paths to the saved figures, sorted by slicekey
+    """
+
+    os.makedirs(folder, exist_ok=True)
+
+    #only the plotted columns of each slice are sent to the worker processes
+    columns = [column for column in dict.fromkeys([xvariable] + list(yvariablelist or [])) if column != None]
+    tasks = []
+    for key, slicedata in data.groupby(slicename, sort=True, observed=True):
+        filename = re.sub(r"[^\w.-]+", "_", str(key)) + "." + fileformat
+        tasks.append((str(key), slicedata[columns], graphtype, xvariable, yvariablelist,
+                      os.path.join(folder, filename), figsize, dpi))
+
+    #render the figures in parallel. The tasks are sent in chunks to limit the overhead per figure
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(processes) as executor:
+        paths = list(executor.map(_exportslice, tasks, chunksize=max(1, len(tasks)//(4*processes))))
+
+    return paths
+
 
 class PlotterWindow:
     """Create a tk window containing a figure created with DataPlotter"""
 
-    def __init__(self, data, slicename, graphtype, xvariable=None, yvariablelist=None, xsize=1280, ysize=720):
+    def __init__(self, data, slicename, graphtype, xvariable=None, yvariablelist=None, xsize=1280, ysize=720, cachesize=32):
         """__init__ constructor for PlotterWindow class
 
         Args:
             data (Pandas Dataframe): Dataframe used to create the plots
             slicename (string): name of column used to get slicekeys
-            graphtype (string): graph type used to plot data. options = (standard)
+            graphtype (string): graph type used to plot data. options = ("Standard", "Panels")
 
             xvariable (string): name of column used as x variable in plot. Default None
-            yvariablelist (list of strings): name/s of column/s used as y variable/s in plot. Max 3 entries. Default None
+            yvariablelist (list of strings): name/s of column/s used as y variable/s in plot. Max 3 entries for "Standard". Default None
             xsize (int): Define width of tk window. Default 1280
             ysize (int): Define height of tk window Default 720
+            cachesize (int): Number of sliced datasets kept in memory for reuse. Default 32
         """
         
         #attributes
@@ -168,6 +346,22 @@ class PlotterWindow:
         self.graphtype = graphtype
         self.slicename = slicename
 
+        #group the row positions of every slicekey once, so a slice only touches its own rows. The keys are
+        #strings, since the graphmenu returns the slicekey as a string
+        self.sliceindex = {str(key): positions for key, positions in
+                           self.data.groupby(self.slicename, sort=False, observed=True).indices.items()}
+
+        #the columns used in the plots, and the least recently used cache of sliced datasets
+        plotcolumns = [self.xvariable] + list(self.yvariablelist or [])
+        self.plotcolumns = [column for column in dict.fromkeys(plotcolumns) if column != None]
+        self.cachesize = cachesize
+        self.slicecache = OrderedDict()
+
+        #import the window and canvas libraries
+        import tkinter as tk
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
         #create the tk window
         self.window = tk.Tk()
 
@@ -223,23 +417,34 @@ class PlotterWindow:
         #draw canvas
         self.canvas.draw()
 
-    def _updateplotter(self, graphnamekey):
-        #Private method. Clears self.figure and add new subplots to self.figure.
+    def _getslice(self, graphnamekey):
+        #Private method. Returns the plotted columns of the rows with the slicekey graphnamekey. The most recently
+        #used slices are kept in self.slicecache
+        
+        if graphnamekey in self.slicecache:
+            self.slicecache.move_to_end(graphnamekey)
+            return self.slicecache[graphnamekey]
 
-        #clear figure
-        self.plotter.clearplots()
-        #set title
-        self.plotter.figuretitle(graphnamekey)
+        #take the rows of the slice from the grouped row positions
+        newplotdata = self.data.take(self.sliceindex[graphnamekey])[self.plotcolumns]
+        self.slicecache[graphnamekey] = newplotdata
+
+        #remove the least recently used slice if the cache is full
+        if len(self.slicecache) > self.cachesize:
+            self.slicecache.popitem(last=False)
+
+        return newplotdata
+
+    def _updateplotter(self, graphnamekey):
+        #Private method. Updates the subplots in self.figure, or clears self.figure and add new subplots to self.figure.
 
         #slice data based on graphnamekey
-        newplotdata = self.data.loc[self.data[self.slicename] == graphnamekey,:]
-        
-        #create standard plot
-        if self.graphtype=="Standard":
-            self.plotter.addsplitbarplot(newplotdata[[self.xvariable, self.yvariablelist[0]]],"plot1")
+        newplotdata = self._getslice(graphnamekey)
 
-            if len(self.yvariablelist)>1:
-                self.plotter.addtwinxlineplot(newplotdata[[self.xvariable, self.yvariablelist[1]]],"plot1")
+        #update the subplots in place if possible, otherwise clear the figure and create the subplots for the graphtype
+        if not updateslice(self.plotter, newplotdata, self.graphtype, self.xvariable, self.yvariablelist):
+            self.plotter.clearplots()
+            drawslice(self.plotter, newplotdata, self.graphtype, self.xvariable, self.yvariablelist)
 
-            if len(self.yvariablelist)>2:
-                self.plotter.addtwinxlineplot(newplotdata[[self.xvariable, self.yvariablelist[2]]],"plot1",color="r")
\ No newline at end of file
+        #set title
+        self.plotter.figuretitle(graphnamekey)
@@ -0,0 +1,278 @@
+#importing necessary libraries. pyarrow is imported when a table is written or read
+import os
+import json
+import numpy as np
+import pandas as pd
+
+
+class DatasetCatalog:
+    """Local catalog of previously fetched tables. Each table is stored as an uncompressed arrow
+    file, which can be memory-mapped, and its metadata is stored separately in a json file"""
+
+    def __init__(self, folder="./catalog"):
+        """__init__ constructor for DatasetCatalog class
+
+        Args:
+            folder (string): folder containing the catalog. Created when the first table is added. Default "./catalog"
+        """
+
+        self.folder = folder
+
+    def _path(self, tableid, extension):
+        #Private method. Returns the path of a file in the catalog
+        return os.path.join(self.folder, str(tableid)+extension)
+
+    def tables(self):
+        """Lists the tables in the catalog
+
+        Returns:
+            tableids (list of strings): sorted ids of the stored tables
+        """
+
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(os.path.splitext(name)[0] for name in os.listdir(self.folder) if name.endswith(".json"))
+
+    def __contains__(self, tableid):
+        return os.path.exists(self._path(tableid, ".json")) and os.path.exists(self._path(tableid, ".arrow"))
+
+    def add(self, tableid, data, variables=None, **metadata):
+        """Stores a table in the catalog, replacing any previous version
+
+        Args:
+            tableid (string): id of the table in the DST api
+            data (Pandas DataFrame): the table
+            variables (dict): variables used to fetch the table from the DST api. Default None
+            **metadata: additional metadata saved with the table
+
+        Returns:
+            table (CatalogTable): the stored table opened from the catalog
+        """
+
+        import pyarrow.feather as feather
+        os.makedirs(self.folder, exist_ok=True)
+
+        #the table is stored without compression, so it can be memory-mapped when opened
+        feather.write_feather(data.reset_index(drop=True), self._path(tableid, ".arrow"), compression="uncompressed")
+
+        #the metadata is kept in a separate file, so the schema can be read without touching the data
+        metadata.update({"tableid": str(tableid),
+                         "variables": variables,
+                         "rows": int(len(data)),
+                         "columns": [str(column) for column in data.columns],
+                         "dtypes": {str(column): str(dtype) for column, dtype in data.dtypes.items()}})
+        with open(self._path(tableid, ".json"), "w", encoding="utf-8") as file:
+            json.dump(metadata, file, ensure_ascii=False, indent=1)
+
+        return self.open(tableid)
+
+    def append(self, tableid, data, **metadata):
+        """Appends rows to a table in the catalog. Columns stored as categories in the catalog are kept as categories.
+
+        Args:
+            tableid (string): id of the table
+            data (Pandas DataFrame): the new rows, with the same columns as the stored table
+            **metadata: metadata updated in the stored metadata
+
+        Returns:
+            table (CatalogTable): the updated table opened from the catalog
+        """
+
+        import pyarrow.feather as feather
+        stored = self.open(tableid)
+
+        #the old rows are read without memory-mapping, so the file can be replaced
+        old = feather.read_table(stored.path, memory_map=False).to_pandas()
+        combined = pd.concat([old, data[old.columns]], ignore_index=True)
+        for column in old.columns:
+            if isinstance(old[column].dtype, pd.CategoricalDtype):
+                combined[column] = combined[column].astype("category")
+
+        variables = metadata.pop("variables", stored.metadata["variables"])
+        stored.metadata.update(metadata)
+        for key in ("tableid", "variables", "rows", "columns", "dtypes"):
+            stored.metadata.pop(key, None)
+
+        return self.add(tableid, combined, variables, **stored.metadata)
+
+    def open(self, tableid):
+        """Opens a table from the catalog. Only the metadata is read.
+
+        Args:
+            tableid (string): id of the table
+
+        Returns:
+            table (CatalogTable): the opened table
+        """
+
+        if tableid not in self:
+            raise KeyError("Table not in catalog: "+str(tableid))
+
+        with open(self._path(tableid, ".json"), encoding="utf-8") as file:
+            metadata = json.load(file)
+
+        return CatalogTable(self._path(tableid, ".arrow"), metadata)
+
+    def remove(self, tableid):
+        """Removes a table from the catalog
+
+        Args:
+            tableid (string): id of the table
+        """
+
+        for extension in (".arrow", ".json"):
+            if os.path.exists(self._path(tableid, extension)):
+                os.remove(self._path(tableid, extension))
+
+
+class CatalogTable:
+    """A table in the DatasetCatalog. Columns are paged in from the memory-mapped file when they are used"""
+
+    def __init__(self, path, metadata):
+        """__init__ constructor for CatalogTable class
+
+        Args:
+            path (string): path to the arrow file
+            metadata (dict): metadata saved with the table
+        """
+
+        self.path = path
+        self.metadata = metadata
+        self.columns = metadata["columns"]
+        self.loaded = {}
+        self._table = None
+
+    def __len__(self):
+        return self.metadata["rows"]
+
+    def _arrowtable(self):
+        #Private method. Memory-maps the arrow file the first time data is needed
+        if self._table is None:
+            import pyarrow.feather as feather
+            self._table = feather.read_table(self.path, memory_map=True)
+        return self._table
+
+    def __getitem__(self, column):
+        """Returns a single column as a Pandas Series. The column is read from the file on first use.
+
+        Args:
+            column (string): name of the column
+
+        Returns:
+            series (Pandas Series): the column
+        """
+
+        if column not in self.loaded:
+            self.loaded[column] = self._arrowtable().column(column).to_pandas().rename(column)
+        return self.loaded[column]
+
+    def read(self, columns=None):
+        """Reads whole columns of the table
+
+        Args:
+            columns (list of strings): names of the columns. Default None reads all columns
+
+        Returns:
+            data (Pandas DataFrame): the selected columns
+        """
+
+        if columns is None:
+            columns = self.columns
+        return pd.DataFrame({column: self[column] for column in columns}, columns=columns)
+
+    def take(self, positions, columns=None):
+        """Reads selected rows of the table. Only the selected rows are copied out of the memory-mapped file.
+
+        Args:
+            positions (numpy array): row positions
+            columns (list of strings): names of the columns. Default None reads all columns
+
+        Returns:
+            data (Pandas DataFrame): the selected rows, indexed by their row positions
+        """
+
+        import pyarrow as pa
+        if columns is None:
+            columns = self.columns
+        positions = np.asarray(positions, dtype=np.int64)
+
+        #take the rows from the arrow table before converting them to pandas
+        rows = self._arrowtable().select(columns).take(pa.array(positions)).to_pandas()
+        rows.index = positions
+
+        return rows
+
+    def select(self, column, values, columns=None):
+        """Reads the rows of the table where a column has one of the given values, e.g. the requested periods
+
+        Args:
+            column (string): name of the column, e.g. "TID"
+            values (list): the values of the selected rows. Values are compared as strings
+            columns (list of strings): names of the columns. Default None reads all columns
+
+        Returns:
+            data (Pandas DataFrame): the selected rows in the order of the table
+        """
+
+        selected = self[column].astype(str).isin([str(value) for value in values]).to_numpy()
+        return self.take(np.flatnonzero(selected), columns).reset_index(drop=True)
+
+
+def refreshtable(catalog, dst, tableid, variables, timevariable="Tid", transform=None):
+    """Fetches a table from the DST api into the catalog. If the table is already stored with the same selection of
+    the other variables, only the periods which are not stored yet are fetched and appended to the table. The periods
+    stored for each table are recorded in its metadata.
+
+    Args:
+        catalog (DatasetCatalog): the catalog
+        dst (pydst.Dst): client for the DST api
+        tableid (string): id of the table in the DST api
+        variables (dict): variables used to fetch the table. ["*"] as the periods of timevariable selects every available period
+        timevariable (string): id of the time variable. Default "Tid"
+        transform (function): function applied to the fetched data before it is stored, e.g. typedataset. Default None
+
+    Returns:
+        table (CatalogTable): the stored table. The table can hold periods which were stored earlier and not requested now,
+                              so read the requested periods with CatalogTable.select
+        fetched (list of strings): the periods which were fetched. Empty if the table was up to date
+    """
+
+    #without a time variable the table can not be updated incrementally, so it is fetched if it is missing or was
+    #fetched with other variables
+    if timevariable not in variables:
+        if tableid not in catalog or catalog.open(tableid).metadata["variables"] != variables:
+            data = dst.get_data(table_id=tableid, variables=variables)
+            catalog.add(tableid, transform(data) if transform else data, variables)
+        return catalog.open(tableid), []
+
+    #find the wanted periods. The metadata of the table is a small request compared to the data
+    periods = [str(period) for period in variables[timevariable]]
+    if "*" in periods:
+        metadata = dst.get_variables(table_id=tableid)
+        timevalues = metadata.loc[metadata["id"] == timevariable, "values"].iloc[0]
+        periods = [str(value["id"]) for value in timevalues]
+
+    #the stored periods can only be reused if the other variables are selected in the same way
+    selection = {key: value for key, value in variables.items() if key != timevariable}
+    stored = catalog.open(tableid) if tableid in catalog else None
+    if stored is not None and "periods" in stored.metadata:
+        storedvariables = stored.metadata["variables"] or {}
+        if {key: value for key, value in storedvariables.items() if key != timevariable} != selection:
+            stored = None
+
+    storedperiods = stored.metadata["periods"] if stored is not None and "periods" in stored.metadata else []
+    missing = [period for period in periods if period not in storedperiods]
+    if missing == []:
+        return stored, []
+
+    #fetch only the missing periods
+    data = dst.get_data(table_id=tableid, variables=dict(selection, **{timevariable: missing}))
+    if transform:
+        data = transform(data)
+
+    if len(storedperiods) == 0:
+        table = catalog.add(tableid, data, variables, periods=missing)
+    else:
+        table = catalog.append(tableid, data, variables=variables, periods=storedperiods+missing)
+
+    return table, missing
@@ -0,0 +1,247 @@
+#importing necessary libraries.
+import numpy as np
+import pandas as pd
+
+
+def typedataset(data, valuecolumn="INDHOLD"):
+    """Converts a dataset retrieved from the DST api to typed columns. The value column is
+    converted to a numeric dtype and every other column is converted to a category, so the
+    conversion only happens once when the data is loaded.
+
+    Args:
+        data (Pandas DataFrame): dataframe returned by the DST api
+        valuecolumn (string): name of the column containing the values. Default "INDHOLD"
+
+    Returns:
+        typed (Pandas DataFrame): dataframe with numeric value column and categorical dimension columns
+    """
+
+    #copy the data, so the raw api result is left untouched
+    typed = data.copy()
+
+    #the api returns the values as strings. Missing values such as ".." become NaN
+    if valuecolumn in typed:
+        typed[valuecolumn] = pd.to_numeric(typed[valuecolumn], errors="coerce")
+
+    #dimension columns only contain a few distinct labels, so they are stored as categories
+    for column in typed.columns:
+        if column != valuecolumn and pd.api.types.is_string_dtype(typed[column]):
+            typed[column] = typed[column].astype("category")
+
+    return typed
+
+
+class DimensionIndex:
+    """Maps each combination of dimension values in a dataset to its row positions"""
+
+    def __init__(self, data, dimensions=("PRISENHED", "TRANSAKT")):
+        """__init__ constructor for DimensionIndex class. The index is built once, so later
+        slices only touch the selected rows instead of scanning the full dataset.
+
+        Args:
+            data (Pandas DataFrame or CatalogTable): typed dataset, see typedataset. A CatalogTable only
+                                                     reads the dimension columns and the sliced rows
+            dimensions (tuple of strings): names of the two columns used to slice the dataset. Default ("PRISENHED", "TRANSAKT")
+        """
+
+        self.data = data
+        self.dimensions = dimensions
+
+        #dictionary with (unit, row) tuples as keys and arrays of row positions as values
+        dimensiondata = pd.DataFrame({dimension: data[dimension] for dimension in dimensions})
+        self.positions = dimensiondata.groupby(list(dimensions), observed=True, sort=False).indices
+
+    def rowpositions(self, unit, rowkeys):
+        """Finds the row positions for the selected rows with the chosen unit
+
+        Args:
+            unit (string): value of the first dimension
+            rowkeys (list of strings): values of the second dimension
+
+        Returns:
+            positions (numpy array): sorted row positions in the dataset
+        """
+
+        #collect the positions for each selected combination. Unknown combinations are skipped
+        found = [self.positions[(unit, key)] for key in rowkeys if (unit, key) in self.positions]
+        if found == []:
+            return np.empty(0, dtype=np.intp)
+
+        #sort the positions to keep the original row order
+        return np.sort(np.concatenate(found))
+
+    def slice(self, unit, rowkeys):
+        """Slices the dataset for the selected rows with the chosen unit
+
+        Args:
+            unit (string): value of the first dimension
+            rowkeys (list of strings): values of the second dimension
+
+        Returns:
+            sliced (Pandas DataFrame): rows of the dataset matching the selection
+        """
+
+        return self.data.take(self.rowpositions(unit, rowkeys))
+
+
+class PivotCache:
+    """Caches the time series and summary statistics of each row in a DimensionIndex, and keeps
+    a wide dataframe which is updated incrementally when the selection changes"""
+
+    def __init__(self, index, timecolumn="TID", valuecolumn="INDHOLD"):
+        """__init__ constructor for PivotCache class
+
+        Args:
+            index (DimensionIndex): index of the dataset to pivot
+            timecolumn (string): name of the column used as index in the pivot. Default "TID"
+            valuecolumn (string): name of the column containing the values. Default "INDHOLD"
+        """
+
+        self.index = index
+        self.timecolumn = timecolumn
+        self.valuecolumn = valuecolumn
+
+        #cached time series and statistics with (unit, row) tuples as keys
+        self.series = {}
+        self.statistics = {}
+
+        #the current selection and the wide dataframe built from it
+        self.unit = None
+        self.rowkeys = []
+        self.pivot = pd.DataFrame()
+
+    def getseries(self, unit, rowkey):
+        """Returns the time series for a single row, computing and caching it on first use
+
+        Args:
+            unit (string): value of the first dimension
+            rowkey (string): value of the second dimension
+
+        Returns:
+            series (Pandas Series): values indexed by time without NaN
+        """
+
+        key = (unit, rowkey)
+        if key not in self.series:
+            #slice the rows for the key and drop missing values
+            rows = self.index.slice(unit, [rowkey]).dropna(subset=[self.valuecolumn])
+            series = pd.Series(rows[self.valuecolumn].values, index=rows[self.timecolumn].values, name=rowkey)
+            series.index.name = self.timecolumn
+            self.series[key] = series.sort_index()
+
+        return self.series[key]
+
+    def getstatistics(self, unit, rowkey):
+        """Returns the summary statistics for a single row as text, computing and caching it on first use
+
+        Args:
+            unit (string): value of the first dimension
+            rowkey (string): value of the second dimension
+
+        Returns:
+            statistics (string): output of describe() for the time series
+        """
+
+        key = (unit, rowkey)
+        if key not in self.statistics:
+            self.statistics[key] = str(self.getseries(unit, rowkey).describe())
+
+        return self.statistics[key]
+
+    def update(self, unit, rowkeys):
+        """Updates the wide dataframe to the new selection. Only the rows which were added or removed
+        since the last update are changed. Selecting a new unit replaces all rows.
+
+        Args:
+            unit (string): value of the first dimension
+            rowkeys (list of strings): values of the second dimension
+
+        Returns:
+            added (list of strings): rows added to the dataframe
+            removed (list of strings): rows removed from the dataframe
+        """
+
+        #a new unit means every current row must be replaced
+        if unit != self.unit:
+            removed = list(self.rowkeys)
+            self.rowkeys = []
+            self.pivot = pd.DataFrame()
+            self.unit = unit
+        else:
+            removed = [key for key in self.rowkeys if key not in rowkeys]
+
+        added = [key for key in rowkeys if key not in self.rowkeys]
+
+        #drop the removed columns
+        dropcolumns = [key for key in removed if key in self.pivot.columns]
+        if dropcolumns != []:
+            self.pivot = self.pivot.drop(columns=dropcolumns).dropna(how="all")
+        self.rowkeys = [key for key in self.rowkeys if key not in removed]
+
+        #join the cached series of the added columns
+        if added != []:
+            newcolumns = pd.concat([self.getseries(unit, key) for key in added], axis=1)
+            if len(self.pivot.columns) == 0:
+                self.pivot = newcolumns
+            else:
+                self.pivot = self.pivot.join(newcolumns, how="outer")
+            self.rowkeys = self.rowkeys + added
+
+        #keep rows and columns sorted as the full pivot would
+        self.pivot = self.pivot.sort_index().reindex(columns=sorted(self.pivot.columns))
+        self.pivot.index.name = self.timecolumn
+        self.pivot.columns.name = self.index.dimensions[1]
+
+        return added, removed
+
+
+class MetadataModel:
+    """Metadata about the variables in a DST table, indexed by variable id and value id"""
+
+    def __init__(self, variables):
+        """__init__ constructor for MetadataModel class. The model is built once per table.
+
+        Args:
+            variables (Pandas DataFrame): dataframe returned by Dst.get_variables with the columns id, text and values
+        """
+
+        #variable ids in the order of the table, and the text and values of each variable
+        self.ids = []
+        self.texts = {}
+        self.values = {}
+
+        for variableid, text, values in zip(variables["id"], variables["text"], variables["values"]):
+            variableid = str(variableid)
+            self.ids.append(variableid)
+            self.texts[variableid] = text
+            self.values[variableid] = list(values)
+
+    def labels(self, variableid):
+        """Returns the text of each value of a variable
+
+        Args:
+            variableid (string): id of the variable
+
+        Returns:
+            labels (list of strings): text of the values in the order of the table
+        """
+
+        return [value["text"] for value in self.values[variableid]]
+
+    def query(self, selection):
+        """Builds the variables dictionary used by Dst.get_data from selected value positions
+
+        Args:
+            selection (dict): variable ids as keys and iterables of selected value positions as values
+
+        Returns:
+            variables (dict): variable ids as keys and lists of selected value ids as values. Variables without selected values are left out
+        """
+
+        variables = {}
+        for variableid, positions in selection.items():
+            valueids = [self.values[variableid][position]["id"] for position in sorted(positions)]
+            if valueids != []:
+                variables[variableid] = valueids
+
+        return variables
@@ -0,0 +1,231 @@
+#importing necessary libraries.
+import os
+import json
+import time
+import cProfile
+import functools
+from contextlib import contextmanager
+
+#the phases shown in the summary of an action, in this order. Other phase names are shown after these
+PHASES = ("network", "parse", "transform", "io", "render")
+
+
+class ActionProfiler:
+    """Times the user actions of the client. Each action is split into phases such as network, parse,
+    transform, io and render. The time of an action which is not spent in a phase is shown as other"""
+
+    def __init__(self, profilefolder=None, tracepath=None, listener=None):
+        """__init__ constructor for ActionProfiler class
+
+        Args:
+            profilefolder (string): folder the cProfile output of every action is dumped in. Default None does not profile
+            tracepath (string): path of a json trace of every action, which is rewritten after each action. The trace can be
+                                opened in chrome://tracing or Perfetto. Default None does not write a trace
+            listener (function): function called with the record of each finished action, e.g. to update a status bar. Default None
+        """
+
+        self.profilefolder = profilefolder
+        self.tracepath = tracepath
+        self.listener = listener
+
+        #list of records of the finished actions. Each record is a dictionary with the name, start, duration and phases
+        self.records = []
+
+        #the action and phase currently being timed
+        self.current = None
+        self.currentphase = None
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def action(self, name):
+        """Times a user action. Actions started inside another action are timed as part of the outer action.
+
+        Args:
+            name (string): name of the action
+        """
+
+        if self.current is not None:
+            yield
+            return
+
+        record = {"name": name, "start": time.perf_counter()-self.start, "duration": 0.0, "phases": [], "error": None}
+        self.current = record
+
+        #cProfile is only enabled for the outer action, since profilers can not be nested
+        profile = cProfile.Profile() if self.profilefolder is not None else None
+        if profile is not None:
+            profile.enable()
+
+        try:
+            yield
+        except Exception as error:
+            record["error"] = repr(error)
+            raise
+        finally:
+            if profile is not None:
+                profile.disable()
+            record["duration"] = time.perf_counter()-self.start-record["start"]
+            self.current = None
+            self.currentphase = None
+            self.records.append(record)
+
+            if profile is not None:
+                os.makedirs(self.profilefolder, exist_ok=True)
+                profile.dump_stats(os.path.join(self.profilefolder, "%s-%d.prof" % (name, len(self.records))))
+            if self.tracepath is not None:
+                self.dumptrace(self.tracepath)
+            if self.listener is not None:
+                self.listener(record)
+
+    @contextmanager
+    def phase(self, name):
+        """Times a phase of the current action. Phases outside an action, and phases inside another phase, are not timed
+        separately.
+
+        Args:
+            name (string): name of the phase, e.g. "network", "parse", "transform", "io" or "render"
+        """
+
+        if self.current is None or self.currentphase is not None:
+            yield
+            return
+
+        record = self.current
+        self.currentphase = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record["phases"].append((name, start-self.start, time.perf_counter()-start))
+            if self.current is record:
+                self.currentphase = None
+
+    def timedaction(self, name):
+        """Decorator timing every call to a function as an action
+
+        Args:
+            name (string): name of the action
+        """
+
+        def decorator(function):
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                with self.action(name):
+                    return function(*args, **kwargs)
+            return wrapper
+
+        return decorator
+
+    def timedfunction(self, function, phase):
+        """Wraps a function, so every call is timed as a phase of the current action
+
+        Args:
+            function (function): the function
+            phase (string): name of the phase
+
+        Returns:
+            wrapper (function): the wrapped function
+        """
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with self.phase(phase):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    def timedobject(self, obj, phase):
+        """Wraps an object, so every call to one of its methods is timed as a phase of the current action,
+        e.g. the client for the DST api as the network phase
+
+        Args:
+            obj (object): the object
+            phase (string): name of the phase
+
+        Returns:
+            proxy (TimedObject): the wrapped object
+        """
+
+        return TimedObject(obj, self, phase)
+
+    def phasetimes(self, record):
+        """Sums the time spent in each phase of an action
+
+        Args:
+            record (dict): record of the action
+
+        Returns:
+            times (dict): phase names as keys and seconds as values, including other for the time outside the phases
+        """
+
+        times = {}
+        for name, start, duration in record["phases"]:
+            times[name] = times.get(name, 0.0)+duration
+        times["other"] = max(record["duration"]-sum(times.values()), 0.0)
+
+        return times
+
+    def summary(self, record=None):
+        """Describes an action in a single line, e.g. for a status bar
+
+        Args:
+            record (dict): record of the action. Default None uses the last action
+
+        Returns:
+            summary (string): the total time and the time of each phase
+        """
+
+        if record is None:
+            if self.records == []:
+                return ""
+            record = self.records[-1]
+
+        times = self.phasetimes(record)
+        order = [name for name in PHASES if name in times]+sorted(name for name in times if name not in PHASES and name != "other")+["other"]
+        text = "%s: %.3f s" % (record["name"], record["duration"])
+        text += "".join(" | %s %.3f s" % (name, times[name]) for name in order if times[name] > 0 or name != "other")
+        if record["error"] is not None:
+            text += " | failed: "+record["error"]
+
+        return text
+
+    def dumptrace(self, path):
+        """Writes the actions as a json trace in the trace event format
+
+        Args:
+            path (string): path of the json file
+        """
+
+        events = []
+        for record in self.records:
+            events.append({"name": record["name"], "cat": "action", "ph": "X", "pid": os.getpid(), "tid": 0,
+                           "ts": record["start"]*1e6, "dur": record["duration"]*1e6, "args": {"error": record["error"]}})
+            for name, start, duration in record["phases"]:
+                events.append({"name": name, "cat": "phase", "ph": "X", "pid": os.getpid(), "tid": 0,
+                               "ts": start*1e6, "dur": duration*1e6, "args": {"action": record["name"]}})
+
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+class TimedObject:
+    """Wraps an object, so calls to its methods are timed as a phase by an ActionProfiler"""
+
+    def __init__(self, obj, profiler, phase):
+        """__init__ constructor for TimedObject class
+
+        Args:
+            obj (object): the wrapped object
+            profiler (ActionProfiler): the profiler timing the calls
+            phase (string): name of the phase
+        """
+
+        self._obj = obj
+        self._profiler = profiler
+        self._phase = phase
+
+    def __getattr__(self, name):
+        attribute = getattr(self._obj, name)
+        if callable(attribute):
+            return self._profiler.timedfunction(attribute, self._phase)
+        return attribute
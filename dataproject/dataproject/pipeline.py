@@ -0,0 +1,245 @@
+#importing necessary libraries.
+import os
+import re
+import json
+import hashlib
+import pandas as pd
+
+from dataproject import storage
+from dataproject.catalog import DatasetCatalog, refreshtable
+
+#the DST tables used in the dataproject notebook. columns maps the api columns to the column names in the panel
+SOURCES = {
+    "population": {"tableid": "INDAMP01",
+                   "variables": {"OMRÅDE": ["*"], "KØN": ["TOT"], "ALDER": ["TOT"], "PERSG": ["IALT"], "Tid": ["*"], "BNØGLE": ["PER"]},
+                   "columns": {"OMRÅDE": "Municipality", "TID": "Year", "INDHOLD": "POP"}},
+    "account": {"tableid": "REGK11",
+                "variables": {"OMRÅDE": ["*"], "FUNK1": ["X"], "DRANST": ["1"], "ART": ["TOT"], "PRISENHED": ["INDL"], "Tid": ["*"]},
+                "columns": {"OMRÅDE": "Municipality", "TID": "Year", "INDHOLD": "Account"}},
+    "unemployment": {"tableid": "AULP01",
+                     "variables": {"OMRÅDE": ["*"], "KØN": ["TOT"], "ALDER": ["TOT"], "Tid": ["*"]},
+                     "columns": {"OMRÅDE": "Municipality", "TID": "Year", "INDHOLD": "Unemployment rate"}},
+    "budget": {"tableid": "BUDK1",
+               "variables": {"REGI07A": ["*"], "FUNK1": ["X"], "DRANST": ["1"], "ART": ["TOT"], "PRISENHED": ["INDL"], "Tid": ["*"]},
+               "columns": {"REGI07A": "Municipality", "TID": "Year", "INDHOLD": "Budget"}},
+}
+
+#the columns of the employment csv file
+EMPLOYMENTCOLUMNS = {"Område": "Municipality", "Tid": "Year", "Indhold": "Employment"}
+
+#rows for regions, provinces and all of Denmark are removed with a single regular expression
+EXCLUDED = re.compile("Region|Province|All Denmark|Landsdel|Hele landet")
+
+
+def fingerprint(*parts):
+    """Creates a fingerprint of the inputs to a pipeline stage
+
+    Args:
+        *parts: json serializable inputs
+
+    Returns:
+        fingerprint (string): sha1 hash of the inputs
+    """
+
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def cleantable(data, columns, years, excluded=EXCLUDED):
+    """Selects and renames the columns of a table, and removes non-municipality rows and rows outside the years
+
+    Args:
+        data (Pandas DataFrame): table from the DST api or the employment csv file
+        columns (dict): column names in the table as keys and column names in the panel as values
+        years (list of strings): years kept in the table
+        excluded (compiled regular expression): rows where Municipality matches are removed. Default EXCLUDED
+
+    Returns:
+        cleaned (Pandas DataFrame): table with the columns Municipality, Year and a value column
+    """
+
+    #select and rename the columns
+    cleaned = data[list(columns)].rename(columns=columns)
+    cleaned["Municipality"] = cleaned["Municipality"].astype(str)
+    cleaned["Year"] = cleaned["Year"].astype(str)
+
+    #remove rows with a single vectorized match and keep the selected years
+    keep = ~cleaned["Municipality"].str.contains(excluded) & cleaned["Year"].isin(years)
+    cleaned = cleaned.loc[keep].reset_index(drop=True)
+
+    #the value column is stored as numbers
+    valuecolumn = cleaned.columns[2]
+    cleaned[valuecolumn] = pd.to_numeric(cleaned[valuecolumn], errors="coerce")
+
+    return cleaned
+
+
+def joinpanel(tables):
+    """Joins tables on a categorical (Municipality, Year) index in a single outer join
+
+    Args:
+        tables (list of Pandas DataFrames): tables with the columns Municipality, Year and value columns
+
+    Returns:
+        panel (Pandas DataFrame): joined table with a row for every municipality and year
+    """
+
+    #every table uses the same categories, so the index codes can be aligned directly
+    municipalities = sorted(set().union(*[table["Municipality"].unique() for table in tables]))
+    years = sorted(set().union(*[table["Year"].unique() for table in tables]))
+
+    indexed = []
+    for table in tables:
+        table = table.copy()
+        table["Municipality"] = pd.Categorical(table["Municipality"], categories=municipalities)
+        table["Year"] = pd.Categorical(table["Year"], categories=years, ordered=True)
+        indexed.append(table.set_index(["Municipality", "Year"]))
+
+    return pd.concat(indexed, axis=1, join="outer").sort_index().reset_index()
+
+
+class MunicipalityPipeline:
+    """Builds the municipality panel used in the dataproject notebook. Tables are fetched through a
+    DatasetCatalog, and the output of every stage is stored, so a stage is skipped if its inputs are unchanged"""
+
+    def __init__(self, folder="./pipeline", years=range(2011, 2018), employmentpath="./Employment.csv", catalog=None, dst=None):
+        """__init__ constructor for MunicipalityPipeline class
+
+        Args:
+            folder (string): folder the stage outputs are stored in. Default "./pipeline"
+            years (iterable of ints): years kept in the panel. Default range(2011, 2018)
+            employmentpath (string): path to the employment csv file. Default "./Employment.csv"
+            catalog (DatasetCatalog): catalog used to cache the DST tables. Default None uses a catalog in folder
+            dst (pydst.Dst): client for the DST api. Default None creates a client when a table is fetched
+        """
+
+        self.folder = folder
+        self.years = [str(year) for year in years]
+        self.employmentpath = employmentpath
+        self.catalog = catalog if catalog != None else DatasetCatalog(os.path.join(folder, "catalog"))
+        self.dst = dst
+
+        #the names of the stages which were run, and not loaded, in the last call to build
+        self.stagesrun = []
+
+    def _runstage(self, name, stagefingerprint, function, rows=None, extend=None, periods=None):
+        #Private method. Loads the stored output of a stage if its fingerprint is unchanged, otherwise runs the
+        #stage and stores the output. If rows and periods are given and only periods were appended to the input since
+        #the output was stored, extend is called with the number of stored rows to process the new rows only. A table
+        #which was fetched again in full may have its rows in another order, so it is only extended when the stored
+        #periods are the first periods of the table
+        datapath = os.path.join(self.folder, name+".parquet")
+        metapath = os.path.join(self.folder, name+".json")
+
+        data = None
+        if os.path.exists(datapath) and os.path.exists(metapath):
+            with open(metapath, encoding="utf-8") as file:
+                stored = json.load(file)
+            if stored.get("fingerprint") == stagefingerprint:
+                if stored.get("rows") == rows:
+                    return storage.loaddataset(datapath)
+                storedperiods = stored.get("periods")
+                appended = storedperiods is not None and periods is not None and periods[:len(storedperiods)] == storedperiods
+                if extend is not None and appended and stored.get("rows") is not None and stored["rows"] < rows:
+                    data = pd.concat([storage.loaddataset(datapath), extend(stored["rows"])], ignore_index=True)
+                    self.stagesrun.append("extend_"+name)
+
+        if data is None:
+            data = function()
+            self.stagesrun.append(name)
+
+        os.makedirs(self.folder, exist_ok=True)
+        storage.savedataset(data, datapath)
+        with open(metapath, "w", encoding="utf-8") as file:
+            json.dump({"fingerprint": stagefingerprint, "rows": rows, "periods": periods}, file)
+
+        return data
+
+    def _getdst(self):
+        #Private method. Creates the client for the DST api the first time it is used
+        if self.dst is None:
+            import pydst
+            self.dst = pydst.Dst(lang="en")
+        return self.dst
+
+    def _sourcetable(self, name, refresh=False):
+        #Private method. Fetches a DST table into the catalog if it is missing. With refresh, the periods which are
+        #not in the catalog yet are fetched and appended. Only the metadata of the cached table is read
+        source = SOURCES[name]
+        tableid = source["tableid"]
+
+        if refresh or tableid not in self.catalog or self.catalog.open(tableid).metadata["variables"] != source["variables"]:
+            table, fetched = refreshtable(self.catalog, self._getdst(), tableid, source["variables"])
+            if fetched != []:
+                self.stagesrun.append("fetch_"+name)
+            return table
+
+        return self.catalog.open(tableid)
+
+    def _employmentfingerprint(self):
+        #Private method. Returns a fingerprint of the employment csv file
+        filestats = os.stat(self.employmentpath)
+        return fingerprint(os.path.abspath(self.employmentpath), filestats.st_size, filestats.st_mtime)
+
+    def _cleanstage(self, name, refresh=False):
+        #Private method. Returns the fingerprint of the cleaning stage for a table, and a function running the stage.
+        #Periods appended to a DST table in the catalog are cleaned and appended to the stored output
+        if name == "employment":
+            columns = EMPLOYMENTCOLUMNS
+            stagefingerprint = fingerprint(self._employmentfingerprint(), columns, self.years, EXCLUDED.pattern)
+            function = lambda: cleantable(pd.read_csv(self.employmentpath, index_col=0), columns, self.years)
+            run = lambda: self._runstage("clean_"+name, stagefingerprint, function)
+            return stagefingerprint, run
+
+        columns = SOURCES[name]["columns"]
+        table = self._sourcetable(name, refresh)
+        stagefingerprint = fingerprint(table.metadata["tableid"], table.metadata["variables"], columns, self.years, EXCLUDED.pattern)
+
+        function = lambda: cleantable(table.read(list(columns)), columns, self.years)
+        extend = lambda start: cleantable(table.take(range(start, len(table)), list(columns)), columns, self.years)
+        periods = table.metadata.get("periods")
+        run = lambda: self._runstage("clean_"+name, stagefingerprint, function, len(table), extend, periods)
+
+        #the panel depends on the number of rows in the table as well
+        return fingerprint(stagefingerprint, len(table)), run
+
+    def clean(self, name, refresh=False):
+        """Runs the cleaning stage for a table, see cleantable
+
+        Args:
+            name (string): name of the table. options = ("population", "account", "unemployment", "budget", "employment")
+            refresh (bool): fetch the periods which are not in the catalog yet. Default False
+
+        Returns:
+            cleaned (Pandas DataFrame): the cleaned table
+        """
+
+        stagefingerprint, run = self._cleanstage(name, refresh)
+        return run()
+
+    def build(self, refresh=False):
+        """Builds the panel with a row for every municipality and year. The columns Surplus and
+        Emp/POP are computed as in the notebook. The cleaned tables are only loaded if the panel
+        must be built again.
+
+        Args:
+            refresh (bool): fetch the periods which are not in the catalog yet. Only new periods are requested from
+                            the DST api, and their rows are appended to the cleaned tables. Default False
+
+        Returns:
+            panel (Pandas DataFrame): the municipality panel
+        """
+
+        self.stagesrun = []
+
+        #find the cleaning stages. The order sets the order of the columns in the panel
+        names = ["population", "account", "unemployment", "budget", "employment"]
+        stages = [self._cleanstage(name, refresh) for name in names]
+
+        def makepanel():
+            panel = joinpanel([run() for stagefingerprint, run in stages])
+            panel["Surplus"] = panel["Budget"]-panel["Account"]
+            panel["Emp/POP"] = panel["Employment"]/panel["POP"]*100
+            return panel
+
+        panelfingerprint = fingerprint([stagefingerprint for stagefingerprint, run in stages])
+        return self._runstage("panel", panelfingerprint, makepanel)
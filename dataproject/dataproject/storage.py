@@ -0,0 +1,107 @@
+#importing necessary libraries.
+import os
+import json
+import pandas as pd
+
+#file formats supported by savedataset and loaddataset. Parquet and feather require the pyarrow library
+FILEFORMATS = {".parquet": "parquet", ".feather": "feather", ".xlsx": "xlsx", ".csv": "csv"}
+
+#first line of a csv file with an index, followed by the index columns as json
+INDEXPREFIX = "#index: "
+
+
+def fileformat(path):
+    """Finds the file format from the extension of a path
+
+    Args:
+        path (string): path to the file
+
+    Returns:
+        fileformat (string): file format. options = ("parquet", "feather", "xlsx", "csv")
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FILEFORMATS:
+        raise ValueError("Unsupported file format: "+extension)
+
+    return FILEFORMATS[extension]
+
+
+def savedataset(data, path, compression=None):
+    """Saves a dataset to a file. The format is chosen from the extension of the path.
+    Parquet and feather files keep the dtypes and the index of the dataset, so categories,
+    numeric columns and e.g. the TID index of a pivot table are restored by loaddataset.
+    Csv files keep the index, which is described in a first line starting with INDEXPREFIX.
+
+    Args:
+        data (Pandas DataFrame): dataset to save
+        path (string): path to the file. Extension must be .parquet, .feather, .xlsx or .csv
+        compression (string): compression used for parquet and feather files, e.g. "snappy", "zstd", "lz4" or "uncompressed".
+                              Default None uses the default of the format, which is snappy for parquet and lz4 for feather
+    """
+
+    currentformat = fileformat(path)
+
+    if currentformat == "parquet":
+        compression = {None: "snappy", "uncompressed": None}.get(compression, compression)
+        data.to_parquet(path, compression=compression, index=not isinstance(data.index, pd.RangeIndex))
+    elif currentformat == "feather":
+        #the index is stored in the pandas metadata of the arrow table, which is read by loaddataset
+        import pyarrow as pa
+        from pyarrow import feather
+        table = pa.Table.from_pandas(data, preserve_index=not isinstance(data.index, pd.RangeIndex))
+        feather.write_feather(table, path, compression=compression)
+    elif currentformat == "xlsx":
+        data.to_excel(path, sheet_name="Sheet1")
+    elif isinstance(data.index, pd.RangeIndex):
+        data.to_csv(path, index=False)
+    else:
+        #the index is written as the first columns, and their names and the names of the index levels are
+        #written in the first line, so loaddataset can restore the index
+        names = list(data.index.names)
+        data = data.reset_index()
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            file.write(INDEXPREFIX+json.dumps({"columns": list(data.columns[:len(names)]), "names": names})+"\n")
+            data.to_csv(file, index=False)
+
+
+def loaddataset(path, columns=None):
+    """Loads a dataset saved with savedataset
+
+    Args:
+        path (string): path to the file. Extension must be .parquet, .feather, .xlsx or .csv
+        columns (list of strings): only load these columns. Default None loads all columns
+
+    Returns:
+        data (Pandas DataFrame): the loaded dataset
+    """
+
+    currentformat = fileformat(path)
+
+    if currentformat == "parquet":
+        return pd.read_parquet(path, columns=columns)
+    elif currentformat == "feather":
+        #the index columns are read with the selected columns, so the index is restored
+        import pyarrow as pa
+        from pyarrow import feather
+        if columns is not None:
+            pandasmetadata = pa.ipc.open_file(path).schema.pandas_metadata or {}
+            indexcolumns = [name for name in pandasmetadata.get("index_columns", []) if isinstance(name, str)]
+            columns = indexcolumns+[column for column in columns if column not in indexcolumns]
+        return feather.read_table(path, columns=columns).to_pandas()
+    elif currentformat == "xlsx":
+        data = pd.read_excel(path, sheet_name="Sheet1", index_col=0)
+        return data if columns is None else data[columns]
+    else:
+        with open(path, encoding="utf-8") as file:
+            firstline = file.readline()
+        if not firstline.startswith(INDEXPREFIX):
+            return pd.read_csv(path, usecols=columns)
+
+        #restore the index described in the first line
+        index = json.loads(firstline[len(INDEXPREFIX):])
+        if columns is not None:
+            columns = index["columns"]+[column for column in columns if column not in index["columns"]]
+        data = pd.read_csv(path, skiprows=1, usecols=columns).set_index(index["columns"])
+        data.index.names = index["names"]
+        return data
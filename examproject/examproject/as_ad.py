@@ -2,6 +2,8 @@
 import numpy as np
 import pandas as pd
 
+from examproject.closedforms import closedforms
+
 class ASAD:
     """Class containing several key functions to solve the AS-AD problem"""
     def __init__(self, gamma, phi, h, b, alpha):
@@ -20,6 +22,9 @@ class ASAD:
         self.b = b
         self.alpha = alpha
         
+        #the equilibrium closed forms derived with sympy, compiled once and loaded from disk
+        self.closedforms = closedforms()
+        
     def sras(self, pi_t1, y_t, y_t1, s_t, s_t1):
         """SRAS function from the problem
         Args:
@@ -66,12 +71,8 @@ class ASAD:
         Returns:
             y (float): current periods output gap
         """
-        #calculate output gap
-        y = ((self.alpha * self.gamma * self.h * phi * y_t1 
-            + self.alpha * self.h * phi * s_t1 - self.alpha
-            * self.h * pi_t1 - self.alpha * self.h * s_t + v_t)
-            /(self.alpha * self.b + self.alpha * self.gamma 
-            * self.h + 1))
+        #calculate output gap with the compiled closed form
+        y = self.closedforms.y(y_t1, pi_t1, s_t, s_t1, v_t, self.alpha, self.gamma, self.h, phi, self.b)
         
         return y
         
@@ -88,9 +89,8 @@ class ASAD:
         Returns:
             pi (float): current periods inflation gap
         """
-        #calculate inflation gap by calling funcy function
-        pi = ((v_t - (self.alpha * self.b + 1) * self.funcy(y_t1, s_t1, pi_t1, s_t, v_t, phi=phi))
-            /(self.alpha*self.h))
+        #calculate inflation gap with the compiled closed form
+        pi = self.closedforms.pi(y_t1, pi_t1, s_t, s_t1, v_t, self.alpha, self.gamma, self.h, phi, self.b)
         
         return pi
         
@@ -237,4 +237,288 @@ class ASAD:
         data["c"] = c_vec
         data["x"] = x_vec
         
-        return data
\ No newline at end of file
+        return data
+    
+    def gapcoefficients(self, phi):
+        """Calculates the coefficients of the equilibrium output and inflation gap, which are linear in last periods
+        gaps and the shocks. The coefficients are found by evaluating funcy and funcpi at unit vectors. The parameters
+        can be numpy arrays, which gives the coefficients of every parameter set at once.
+        
+        Args:
+            phi (float): parameter for AS-AD curve
+            
+        Returns:
+            M (numpy array): coefficients of (y_t1, pi_t1) with shape (..., 2, 2). The rows are y and pi
+            B (numpy array): coefficients of (s_t1, s_t, v_t) with shape (..., 2, 3). The rows are y and pi
+        """
+        shape = np.broadcast(self.gamma, self.h, self.b, self.alpha, phi).shape
+        units = np.eye(5).reshape((5, 5)+(1,)*len(shape))
+        arguments = dict(zip(("y_t1", "pi_t1", "s_t1", "s_t", "v_t"), units), phi=phi)
+        
+        #gaps has the shape (2, 5, ...), with a row for y and pi and a column for every unit vector
+        gaps = np.stack([self.funcy(**arguments), self.funcpi(**arguments)])
+        gaps = np.moveaxis(gaps, (0, 1), (-2, -1))
+        
+        return gaps[..., :2], gaps[..., 2:]
+    
+    def statespace(self, omega, delta, sigmax, sigmac, phi):
+        """State-space form of the stochastic AS-AD model. The state is (y_t, pi_t, s_t, v_t), and follows
+        
+            state_t = T state_t-1 + R (c_t, x_t)
+            
+        where c_t and x_t are the independent supply and demand shocks of ar_s and ar_v with covariance Q.
+        The output and inflation gap are the first two elements of the state. The parameters can be numpy arrays,
+        see gapcoefficients.
+        
+        Args:
+            omega (float): autoregressive parameter
+            delta (float): autoregressive parameter
+            sigmax (float): demand variance
+            sigmac (float): supply variance
+            phi (float): parameter for AS-AD curve
+            
+        Returns:
+            T (numpy array): transition matrix with shape (..., 4, 4)
+            R (numpy array): shock loadings with shape (..., 4, 2)
+            Q (numpy array): covariance of the shocks with shape (..., 2, 2)
+        """
+        M, B = self.gapcoefficients(phi)
+        shape = np.broadcast(M[..., 0, 0], omega, delta, sigmax, sigmac).shape
+        omega, delta, sigmax, sigmac = [np.broadcast_to(value, shape) for value in (omega, delta, sigmax, sigmac)]
+        M = np.broadcast_to(M, shape+(2, 2))
+        B = np.broadcast_to(B, shape+(2, 3))
+        
+        #insert s_t = omega*s_t1 + c_t and v_t = delta*v_t1 + x_t in the equilibrium gaps
+        T = np.zeros(shape+(4, 4))
+        T[..., :2, :2] = M
+        T[..., :2, 2] = B[..., 0]+B[..., 1]*omega[..., None]
+        T[..., :2, 3] = B[..., 2]*delta[..., None]
+        T[..., 2, 2] = omega
+        T[..., 3, 3] = delta
+        
+        R = np.zeros(shape+(4, 2))
+        R[..., :2, 0] = B[..., 1]
+        R[..., :2, 1] = B[..., 2]
+        R[..., 2, 0] = 1
+        R[..., 3, 1] = 1
+        
+        Q = np.zeros(shape+(2, 2))
+        Q[..., 0, 0] = sigmac**2
+        Q[..., 1, 1] = sigmax**2
+        
+        return T, R, Q
+    
+    def stoch_chunks(self, N, omega, delta, sigmax, sigmac, seed, phi, chunksize=10**6):
+        """Simulates the stochastic AS-AD model in chunks. The state is carried from one chunk to the next, so
+        only one chunk is kept in memory. The shocks are drawn from two independent random streams, so the
+        simulation does not depend on the chunksize.
+        
+        The model is linear, so within a chunk the AR shocks and the output and inflation gaps are calculated
+        with linear filters instead of a loop over the periods. The coefficients of the filters are found from
+        funcy and funcpi, so they follow the compiled closed forms.
+        
+        Args:
+            N (int): number of periods
+            omega (float): autoregressive parameter
+            delta (float): autoregressive parameter
+            sigmax (float): demand variance
+            sigmac (float): supply variance
+            seed (int or numpy SeedSequence): seed for random draws
+            phi (float): parameter for AS-AD curve
+            chunksize (int): number of periods in a chunk. Default 10**6
+            
+        Yields:
+            data (dictionary): arrays with the iteration, pi, y, s, v, c and x of the periods in the chunk
+        """
+        from scipy.signal import lfilter
+        
+        #the output and inflation gap are linear in last periods gaps and the shocks
+        M, B = self.gapcoefficients(phi)
+        
+        #in the eigenvectors of M, the gaps are separate AR(1) processes, which are filtered one at a time
+        eigenvalues, P = np.linalg.eig(M)
+        Pinv = np.linalg.inv(P)
+        
+        #independent random streams for the supply and demand shocks
+        seedsequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        cstream, xstream = [np.random.default_rng(child) for child in seedsequence.spawn(2)]
+        
+        #state carried between chunks
+        s_last, v_last = 0.0, 0.0
+        modes_last = np.zeros(2, dtype=eigenvalues.dtype)
+        
+        for start in range(0, N, chunksize):
+            n = min(chunksize, N-start)
+            iteration = np.arange(start, start+n)
+            
+            #draw stochastic shocks and set the initial values as in stoch_simulation. Period 0 is the steady state
+            c_vec = cstream.normal(0, sigmac, n)
+            x_vec = xstream.normal(0, sigmax, n)
+            for period, cvalue, xvalue in ((0, 0, 0), (1, 0, 0.1)):
+                if start <= period < start+n:
+                    c_vec[period-start] = cvalue
+                    x_vec[period-start] = xvalue
+            
+            #calculate demand/supply shock as AR(1) processes
+            v_vec = lfilter([1], [1, -delta], x_vec, zi=[delta*v_last])[0]
+            s_vec = lfilter([1], [1, -omega], c_vec, zi=[omega*s_last])[0]
+            s_lag = np.concatenate([[s_last], s_vec[:-1]])
+            
+            #calculate inflation/output gap by filtering every mode
+            inputs = Pinv @ (B @ np.vstack([s_lag, s_vec, v_vec]))
+            modes = np.empty_like(inputs)
+            for j, eigenvalue in enumerate(eigenvalues):
+                modes[j] = lfilter([1], [1, -eigenvalue], inputs[j], zi=[eigenvalue*modes_last[j]])[0]
+            y_vec, pi_vec = np.real(P @ modes)
+            
+            s_last, v_last = s_vec[-1], v_vec[-1]
+            modes_last = modes[:, -1]
+            
+            yield {"iteration": iteration, "pi": pi_vec, "y": y_vec, "s": s_vec, "v": v_vec, "c": c_vec, "x": x_vec}
+    
+    def stream_moments(self, N, omega, delta, sigmax, sigmac, seed, phi, chunksize=10**6):
+        """Simulates the stochastic AS-AD model in chunks with stoch_chunks and updates the moments used in the
+        notebook online, so memory use does not depend on N
+        
+        Args:
+            N (int): number of periods
+            omega (float): autoregressive parameter
+            delta (float): autoregressive parameter
+            sigmax (float): demand variance
+            sigmac (float): supply variance
+            seed (int): seed for random draws
+            phi (float): parameter for AS-AD curve
+            chunksize (int): number of periods in a chunk. Default 10**6
+            
+        Returns:
+            moments (dictionary): variances, correlation and autocorrelations of the output and inflation gap, see OnlineMoments
+        """
+        moments = OnlineMoments()
+        for chunk in self.stoch_chunks(N, omega, delta, sigmax, sigmac, seed, phi, chunksize):
+            moments.update(chunk["y"], chunk["pi"])
+        
+        return moments.moments()
+    
+    def moment_distribution(self, N, omega, delta, sigmax, sigmac, phi, replications=1000, seed=404, 
+                            processes=None, confidence=0.95, chunksize=10**6):
+        """Simulates the stochastic AS-AD model with many seeds, and calculates the distribution of the moments
+        used in the notebook. Every replication uses an independent random stream spawned from seed, and the
+        replications are split between worker processes.
+        
+        Args:
+            N (int): number of periods in a replication
+            omega (float): autoregressive parameter
+            delta (float): autoregressive parameter
+            sigmax (float): demand variance
+            sigmac (float): supply variance
+            phi (float): parameter for AS-AD curve
+            replications (int): number of replications. Default 1000
+            seed (int): seed the random streams are spawned from. Default 404
+            processes (int): number of worker processes. Default None uses every cpu. 1 runs the replications in this process
+            confidence (float): level of the confidence intervals. Default 0.95
+            chunksize (int): number of periods in a chunk, see stoch_chunks. Default 10**6
+            
+        Returns:
+            draws (dataframe): the moments of every replication, see stream_moments
+            summary (dataframe): mean, standard deviation and percentile interval of every moment, and the confidence interval of the mean
+        """
+        import os
+        from statistics import NormalDist
+        
+        #split the independent random streams into a contiguous batch for every process, so replication r always
+        #uses stream r and is row r of draws
+        children = np.random.SeedSequence(seed).spawn(replications)
+        processes = processes or os.cpu_count() or 1
+        parameters = (self.gamma, self.phi, self.h, self.b, self.alpha)
+        tasks = [(parameters, N, omega, delta, sigmax, sigmac, phi, list(batch), chunksize)
+                 for batch in np.array_split(np.array(children, dtype=object), min(processes, replications))]
+        
+        if processes == 1:
+            results = [_momenttask(task) for task in tasks]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(processes) as executor:
+                results = list(executor.map(_momenttask, tasks))
+        draws = pd.DataFrame([moments for result in results for moments in result]).drop(columns="periods")
+        
+        #percentile interval of the moments, and normal confidence interval of the mean over the replications
+        tail = (1-confidence)/2
+        z = NormalDist().inv_cdf(1-tail)
+        summary = pd.DataFrame({"mean": draws.mean(), "std": draws.std(ddof=1)})
+        summary["mean lower"] = summary["mean"]-z*summary["std"]/np.sqrt(len(draws))
+        summary["mean upper"] = summary["mean"]+z*summary["std"]/np.sqrt(len(draws))
+        summary["lower"] = draws.quantile(tail)
+        summary["upper"] = draws.quantile(1-tail)
+        
+        return draws, summary
+
+
+def _momenttask(task):
+    #Private function. Calculates the moments for a batch of random streams. Runs in the worker processes of moment_distribution
+    parameters, N, omega, delta, sigmax, sigmac, phi, children, chunksize = task
+    model = ASAD(*parameters)
+    return [model.stream_moments(N, omega, delta, sigmax, sigmac, child, phi, chunksize) for child in children]
+
+
+class OnlineMoments:
+    """Running moments of the output and inflation gap, which are updated one chunk at a time"""
+    def __init__(self):
+        """__init__ constructor for OnlineMoments class"""
+        #count, mean and co-moment matrix of (y, pi)
+        self.n = 0
+        self.mean = np.zeros(2)
+        self.comoment = np.zeros((2, 2))
+        
+        #count, mean and co-moment matrix of the pairs (y_t, y_t-1, pi_t, pi_t-1)
+        self.npairs = 0
+        self.meanpairs = np.zeros(4)
+        self.comomentpairs = np.zeros((4, 4))
+        
+        #last values of the previous chunk
+        self.last = None
+    
+    @staticmethod
+    def _merge(n, mean, comoment, data):
+        #Private method. Merges the moments of a chunk into the running moments
+        m = len(data)
+        if m == 0:
+            return n, mean, comoment
+        chunkmean = data.mean(axis=0)
+        centered = data-chunkmean
+        delta = chunkmean-mean
+        total = n+m
+        mean = mean+delta*m/total
+        comoment = comoment+centered.T @ centered+np.outer(delta, delta)*n*m/total
+        return total, mean, comoment
+    
+    def update(self, y, pi):
+        """Adds a chunk of periods
+        Args:
+            y (numpy array): output gap of the periods
+            pi (numpy array): inflation gap of the periods
+        """
+        data = np.column_stack([y, pi])
+        self.n, self.mean, self.comoment = self._merge(self.n, self.mean, self.comoment, data)
+        
+        #the first pair of the chunk uses the last period of the previous chunk
+        lagged = data if self.last is None else np.vstack([self.last, data])
+        pairs = np.column_stack([lagged[1:, 0], lagged[:-1, 0], lagged[1:, 1], lagged[:-1, 1]])
+        self.npairs, self.meanpairs, self.comomentpairs = self._merge(self.npairs, self.meanpairs, self.comomentpairs, pairs)
+        self.last = data[-1]
+    
+    def moments(self):
+        """Calculates the moments of the added periods as in the notebook
+        Returns:
+            moments (dictionary): number of periods, means, variances (as np.var), correlation and first order autocorrelations
+        """
+        def corr(comoment, i, j):
+            return comoment[i, j]/np.sqrt(comoment[i, i]*comoment[j, j])
+        
+        return {"periods": self.n,
+                "y mean": float(self.mean[0]),
+                "pi mean": float(self.mean[1]),
+                "y variance": float(self.comoment[0, 0]/self.n),
+                "pi variance": float(self.comoment[1, 1]/self.n),
+                "y-pi corr": float(corr(self.comoment, 0, 1)),
+                "y autocorr": float(corr(self.comomentpairs, 0, 1)),
+                "pi autocorr": float(corr(self.comomentpairs, 2, 3))}
@@ -0,0 +1,117 @@
+#import libraries. sympy is only imported when the closed forms must be derived
+import os
+import hashlib
+import importlib.util
+
+#the AD and SRAS curves of the AS-AD model, written with the names of the symbols used in the closed forms
+AD = "1/(h*alpha)*(v_t-(1+b*alpha)*y_t)"
+SRAS = "pi_t1 + gamma*y_t - phi*gamma*y_t1 + s_t - phi*s_t1"
+
+#arguments of the compiled functions, in order
+ARGUMENTS = ("y_t1", "pi_t1", "s_t", "s_t1", "v_t", "alpha", "gamma", "h", "phi", "b")
+
+#folder the generated code is stored in
+CACHEFOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__closedforms__")
+
+#compiled closed forms which are already loaded, with the hash of the equations as keys
+_loaded = {}
+
+
+def equationhash():
+    """Calculates a hash of the equations and the arguments of the closed forms
+
+    Returns:
+        hash (string): sha1 hash, which changes when the equations are changed
+    """
+
+    return hashlib.sha1("\n".join((AD, SRAS) + ARGUMENTS).encode("utf-8")).hexdigest()
+
+
+def derive():
+    """Derives the equilibrium output gap and inflation gap by solving AD = SRAS for y_t with sympy,
+    as in the notebook
+
+    Returns:
+        y (sympy expression): equilibrium output gap
+        pi (sympy expression): equilibrium inflation gap
+    """
+
+    import sympy as sm
+
+    symbols = {name: sm.Symbol(name) for name in ARGUMENTS + ("y_t",)}
+    ad = sm.sympify(AD, locals=symbols)
+    sras = sm.sympify(SRAS, locals=symbols)
+
+    #solve the equilibrium condition for the output gap, and insert it in the AD curve
+    y = sm.solve(sm.Eq(ad, sras), symbols["y_t"])[0]
+    pi = ad.subs(symbols["y_t"], y)
+
+    return y, pi
+
+
+def generatecode(y, pi, key):
+    """Generates the source of a python module with the closed forms as NumPy functions
+
+    Args:
+        y (sympy expression): equilibrium output gap
+        pi (sympy expression): equilibrium inflation gap
+        key (string): hash of the equations
+
+    Returns:
+        code (string): source of the module with the functions y and pi
+    """
+
+    from sympy.printing.numpy import NumPyPrinter
+
+    printer = NumPyPrinter()
+    arguments = ", ".join(ARGUMENTS)
+    lines = ["#generated by examproject.closedforms from the equations with hash " + key + ". Do not edit",
+             "import numpy",
+             "",
+             "def y(" + arguments + "):",
+             "    return " + printer.doprint(y),
+             "",
+             "def pi(" + arguments + "):",
+             "    return " + printer.doprint(pi),
+             ""]
+
+    return "\n".join(lines)
+
+
+def closedforms(folder=CACHEFOLDER):
+    """Loads the compiled closed forms. The code is generated with sympy the first time, and stored in the
+    folder with the hash of the equations in the file name, so later imports only load the stored code.
+
+    Args:
+        folder (string): folder the generated code is stored in. Default CACHEFOLDER
+
+    Returns:
+        module (module): module with the functions y and pi, which take the arguments in ARGUMENTS
+    """
+
+    key = equationhash()
+    if key in _loaded:
+        return _loaded[key]
+
+    path = os.path.join(folder, "asad_" + key + ".py")
+    if not os.path.exists(path):
+        code = generatecode(*derive(), key)
+
+        #if the folder can not be written, the code is compiled without being stored
+        try:
+            os.makedirs(folder, exist_ok=True)
+            with open(path + ".tmp", "w", encoding="utf-8") as file:
+                file.write(code)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            module = type(os)("asad_" + key)
+            exec(compile(code, "asad_" + key, "exec"), module.__dict__)
+            _loaded[key] = module
+            return module
+
+    spec = importlib.util.spec_from_file_location("asad_" + key, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _loaded[key] = module
+
+    return module
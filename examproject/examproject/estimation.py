@@ -0,0 +1,301 @@
+#import libraries. scipy is only imported when a model is estimated
+import os
+import glob
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from examproject.as_ad import ASAD
+
+#the parameters of the stochastic AS-AD model, and the values used in the notebook
+PARAMETERS = ("gamma", "phi", "h", "b", "alpha", "omega", "delta", "sigmax", "sigmac")
+STARTVALUES = {"gamma": 0.075, "phi": 0.0, "h": 0.5, "b": 0.5, "alpha": 5.76,
+               "omega": 0.15, "delta": 0.8, "sigmax": 3.492, "sigmac": 0.2}
+
+#the parameters estimated by default. The gaps only depend on alpha through alpha*h and alpha*b, and are unchanged when
+#alpha*h, 1+alpha*b and sigmax are scaled by the same factor, so alpha and h are fixed
+ESTIMATED = ("gamma", "phi", "b", "omega", "delta", "sigmax", "sigmac")
+
+#start values of estimated parameters which differ from STARTVALUES. phi = 0 in the notebook is on the boundary of its
+#range, where the optimizer can not move it, so phi is started inside the range
+ESTIMATIONSTART = {"phi": 0.5}
+
+#the range of every parameter. The optimizer works on unconstrained values, which are mapped into the range
+RANGES = {"gamma": "positive", "h": "positive", "b": "positive", "alpha": "positive",
+          "sigmax": "positive", "sigmac": "positive", "phi": "unit", "omega": "ar", "delta": "ar"}
+
+
+def constrain(name, value):
+    """Maps an unconstrained value into the range of a parameter
+
+    Args:
+        name (string): name of the parameter, see PARAMETERS
+        value (float or numpy array): unconstrained value
+
+    Returns:
+        value (float or numpy array): value of the parameter
+    """
+
+    if RANGES[name] == "positive":
+        return np.exp(value)
+    if RANGES[name] == "unit":
+        return 1/(1+np.exp(-value))
+    return np.tanh(value)
+
+
+def unconstrain(name, value, margin=10**-4):
+    """Maps the value of a parameter to an unconstrained value. Values on the boundary of the range, e.g. phi = 0
+    in the notebook, are moved inside the range by margin.
+
+    Args:
+        name (string): name of the parameter, see PARAMETERS
+        value (float or numpy array): value of the parameter
+        margin (float): smallest distance to the boundary of the range. Default 10**-4
+
+    Returns:
+        value (float or numpy array): unconstrained value
+    """
+
+    if RANGES[name] == "positive":
+        return np.log(np.maximum(value, margin))
+    if RANGES[name] == "unit":
+        value = np.clip(value, margin, 1-margin)
+        return np.log(value/(1-value))
+    return np.arctanh(np.clip(value, -1+margin, 1-margin))
+
+
+def kalmanloglikelihood(T, R, Q, observations, measurement=0.0, tolerance=10**-12):
+    """Calculates the log-likelihood of observations of the first two elements of a linear state-space model
+
+        state_t = T state_t-1 + R e_t,      e_t ~ N(0, Q)
+        observation_t = state_t[:2] + u_t,  u_t ~ N(0, measurement**2 I)
+
+    with the Kalman filter. The filter starts in the unconditional distribution of the state. The model can be
+    a batch of models, which are filtered at once, e.g. every country or every parameter set of a numerical gradient.
+    Missing observations are NaN, and are skipped. When the covariance of the state has converged and no more
+    observations are missing, the gain is kept fixed, so only the mean of the state is updated in later periods.
+
+    Args:
+        T (numpy array): transition matrices with shape (..., k, k)
+        R (numpy array): shock loadings with shape (..., k, m)
+        Q (numpy array): covariance of the shocks with shape (..., m, m)
+        observations (numpy array): observations with shape (..., periods, 2). Must broadcast with the batch of models
+        measurement (float or numpy array): standard deviation of the measurement errors. Default 0.0
+        tolerance (float): largest relative change of the covariance of the state when it has converged. Default 10**-12
+
+    Returns:
+        loglikelihood (numpy array): log-likelihood of every model in the batch. -inf for non-stationary models
+    """
+
+    T, R, Q = np.asarray(T, dtype=float), np.asarray(R, dtype=float), np.asarray(Q, dtype=float)
+    observations = np.asarray(observations, dtype=float)
+    k = T.shape[-1]
+    periods = observations.shape[-2]
+    shape = np.broadcast_shapes(T.shape[:-2], R.shape[:-2], Q.shape[:-2], observations.shape[:-2], np.shape(measurement))
+
+    #flatten the batch of models to a single dimension
+    size = int(np.prod(shape))
+    T = np.broadcast_to(T, shape+T.shape[-2:]).reshape(size, k, k)
+    RQR = np.broadcast_to(R @ Q @ np.swapaxes(R, -1, -2), shape+(k, k)).reshape(size, k, k)
+    observations = np.broadcast_to(observations, shape+(periods, 2)).reshape(size, periods, 2)
+    H = np.broadcast_to(np.asarray(measurement, dtype=float)**2, shape).reshape(size, 1, 1)*np.eye(2)
+
+    #the unconditional covariance solves P = T P T' + RQR'. Models with an eigenvalue outside the unit circle have none
+    stationary = np.all(np.abs(np.linalg.eigvals(T)) < 1, axis=-1)
+    system = np.eye(k*k)-np.einsum("nij,nlm->niljm", T, T).reshape(size, k*k, k*k)
+    system[~stationary] = np.eye(k*k)
+    P = np.linalg.solve(system, RQR.reshape(size, k*k, 1)).reshape(size, k, k)
+    P = (P+np.swapaxes(P, -1, -2))/2
+    state = np.zeros((size, k))
+
+    #periods from which no observations are missing in any model
+    missing = ~np.isfinite(observations).all(axis=(0, 2))
+    complete = np.flip(np.cumsum(np.flip(missing))) == 0
+
+    loglikelihood = np.zeros(size)
+    for t in range(periods):
+        observation = observations[:, t]
+
+        #the observed elements of the period. Missing elements get a unit variance and a zero residual,
+        #so they do not change the state or the likelihood
+        observed = np.isfinite(observation)
+        F = P[:, :2, :2]+H
+        PZ = P[:, :, :2]
+        if not observed.all():
+            F = F*observed[:, :, None]*observed[:, None, :]+np.eye(2)*~observed[:, None, :]
+            PZ = PZ*observed[:, None, :]
+
+        #the inverse and determinant of the 2x2 covariance of the residuals
+        determinant = F[:, 0, 0]*F[:, 1, 1]-F[:, 0, 1]*F[:, 1, 0]
+        Finv = np.stack([np.stack([F[:, 1, 1], -F[:, 0, 1]], axis=-1),
+                         np.stack([-F[:, 1, 0], F[:, 0, 0]], axis=-1)], axis=-2)/determinant[:, None, None]
+        gain = PZ @ Finv
+
+        residual = np.where(observed, observation-state[:, :2], 0)
+        loglikelihood -= 0.5*(np.log(2*np.pi)*observed.sum(axis=1)+np.log(determinant)
+                              +np.einsum("ni,nij,nj->n", residual, Finv, residual))
+
+        #update and predict the mean and covariance of the state. The filtered covariance is singular without
+        #measurement errors, and rounding errors grow unless the covariance is kept symmetric
+        state = np.einsum("nij,nj->ni", T, state+np.einsum("nij,nj->ni", gain, residual))
+        previous = P
+        P = T @ (P-gain @ np.swapaxes(PZ, -1, -2)) @ np.swapaxes(T, -1, -2)+RQR
+        P = (P+np.swapaxes(P, -1, -2))/2
+        if complete[t] and np.max(np.abs(P-previous)) <= tolerance*np.max(np.abs(P)):
+            break
+    else:
+        t = periods
+
+    #in the steady state the gain is fixed, so the mean of the state follows state = A state + B observation, and
+    #the residuals of the remaining periods are found first and added to the likelihood at once
+    if t+1 < periods:
+        F = P[:, :2, :2]+H
+        gain = P[:, :, :2] @ np.linalg.inv(F)
+        A = T @ (np.eye(k)-np.concatenate([gain, np.zeros((size, k, k-2))], axis=2))
+        B = T @ gain
+        remaining = observations[:, t+1:, :, None]
+        residuals = np.empty_like(remaining)
+        state = state[:, :, None]
+        for i in range(periods-t-1):
+            residuals[:, i] = remaining[:, i]-state[:, :2]
+            state = A @ state+B @ remaining[:, i]
+        residuals = residuals[..., 0]
+        quadratic = np.einsum("nti,nij,ntj->n", residuals, np.linalg.inv(F), residuals)
+        loglikelihood -= 0.5*((periods-t-1)*(2*np.log(2*np.pi)+np.log(np.linalg.det(F)))+quadratic)
+
+    loglikelihood = np.where(stationary & np.isfinite(loglikelihood), loglikelihood, -np.inf)
+    return loglikelihood.reshape(shape)
+
+
+def loglikelihood(parameters, observations, measurement=0.0):
+    """Calculates the log-likelihood of the stochastic AS-AD model, see ASAD.statespace and kalmanloglikelihood
+
+    Args:
+        parameters (dict): values of the parameters in PARAMETERS. The values can be numpy arrays, which gives the
+                           log-likelihood of every parameter set at once
+        observations (numpy array): output gap and inflation gap with shape (..., periods, 2)
+        measurement (float): standard deviation of the measurement errors. Default 0.0
+
+    Returns:
+        loglikelihood (numpy array): log-likelihood of every parameter set
+    """
+
+    model = ASAD(parameters["gamma"], parameters["phi"], parameters["h"], parameters["b"], parameters["alpha"])
+    T, R, Q = model.statespace(parameters["omega"], parameters["delta"], parameters["sigmax"], parameters["sigmac"], parameters["phi"])
+
+    #a batch of parameter sets gets an extra dimension before the periods of the observations
+    observations = np.asarray(observations, dtype=float)
+    if T.ndim > 2 and observations.ndim == 2:
+        observations = observations[None]
+
+    return kalmanloglikelihood(T, R, Q, observations, measurement)
+
+
+def estimate(observations, start=None, estimated=ESTIMATED, measurement=0.0, step=10**-5, maxiter=1000):
+    """Estimates the parameters of the stochastic AS-AD model by maximum likelihood. The optimizer works on
+    unconstrained parameters, see constrain, and the gradient is found by central differences. The likelihood
+    of the parameter sets of the gradient is calculated in a single batch of Kalman filters.
+
+    Args:
+        observations (numpy array): output gap and inflation gap with shape (periods, 2). Missing observations are NaN
+        start (dict): start values of the parameters, and values of the parameters which are not estimated. Start values must be
+                      inside the range of the parameter, see RANGES. Default None uses STARTVALUES and ESTIMATIONSTART
+        estimated (tuple): names of the estimated parameters. Default ESTIMATED
+        measurement (float): standard deviation of the measurement errors. Default 0.0
+        step (float): step of the central differences. Default 10**-5
+        maxiter (int): maximum number of iterations of the optimizer. Default 1000
+
+    Returns:
+        result (dictionary): the value of every parameter, the log-likelihood, the number of observed periods, and
+                             whether the optimizer converged, with its number of iterations and message
+    """
+    from scipy import optimize
+
+    names = list(estimated)
+    values = dict(STARTVALUES, **{name: value for name, value in ESTIMATIONSTART.items() if name in names})
+    values.update(start or {})
+    observations = np.asarray(observations, dtype=float)
+    n = len(names)
+
+    #the parameter sets of the central differences are the rows of points
+    directions = np.vstack([np.zeros(n), np.eye(n)*step, -np.eye(n)*step])
+
+    def objective(x):
+        points = x+directions
+        parameters = dict(values)
+        for i, name in enumerate(names):
+            parameters[name] = constrain(name, points[:, i])
+        negative = -loglikelihood(parameters, observations, measurement)
+        if not np.all(np.isfinite(negative)):
+            return np.inf, np.zeros(n)
+        return negative[0], (negative[1:n+1]-negative[n+1:])/(2*step)
+
+    x0 = np.array([unconstrain(name, values[name]) for name in names])
+    solution = optimize.minimize(objective, x0, jac=True, method="L-BFGS-B", options={"maxiter": maxiter})
+
+    result = dict(values)
+    for i, name in enumerate(names):
+        result[name] = float(constrain(name, solution.x[i]))
+    result["loglikelihood"] = float(-solution.fun)
+    result["periods"] = int(np.isfinite(observations).any(axis=1).sum())
+    result["success"] = bool(solution.success)
+    result["iterations"] = int(solution.nit)
+    result["message"] = str(solution.message)
+
+    return result
+
+
+def loaddatasets(folder, pattern="*.csv", columns=("y", "pi")):
+    """Loads the observed output gap and inflation gap of many datasets, e.g. a file for every country
+
+    Args:
+        folder (string): folder with the files
+        pattern (string): pattern of the file names. csv and parquet files can be loaded. Default "*.csv"
+        columns (tuple): names of the output gap and inflation gap columns. Default ("y", "pi")
+
+    Returns:
+        datasets (dict): file names without extension as keys and arrays with shape (periods, 2) as values
+    """
+
+    datasets = {}
+    for path in sorted(glob.glob(os.path.join(folder, pattern))):
+        name, extension = os.path.splitext(os.path.basename(path))
+        data = pd.read_parquet(path) if extension == ".parquet" else pd.read_csv(path)
+        datasets[name] = data[list(columns)].to_numpy(dtype=float)
+
+    return datasets
+
+
+def _estimatetask(task):
+    #Private function. Estimates the model for a single dataset. Runs in the worker processes of estimatebatch
+    name, observations, start, estimated, measurement, options = task
+    return dict({"dataset": name}, **estimate(observations, start, estimated, measurement, **options))
+
+
+def estimatebatch(datasets, start=None, estimated=ESTIMATED, measurement=0.0, processes=None, **options):
+    """Estimates the parameters of the stochastic AS-AD model for many datasets in parallel worker processes
+
+    Args:
+        datasets (dict or string): names as keys and observations as values, or a folder loaded with loaddatasets
+        start (dict): start values of the parameters, see estimate. Default None uses STARTVALUES and ESTIMATIONSTART
+        estimated (tuple): names of the estimated parameters. Default ESTIMATED
+        measurement (float): standard deviation of the measurement errors. Default 0.0
+        processes (int): number of worker processes. Default None uses every cpu. 1 estimates the datasets in this process
+        **options: other options of estimate, e.g. maxiter
+
+    Returns:
+        dataframe (pandas dataframe): a row for every dataset with the columns returned by estimate
+    """
+
+    if isinstance(datasets, str):
+        datasets = loaddatasets(datasets)
+    tasks = [(name, observations, start, estimated, measurement, options) for name, observations in datasets.items()]
+
+    processes = processes or os.cpu_count() or 1
+    if processes == 1:
+        results = [_estimatetask(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(_estimatetask, tasks))
+
+    return pd.DataFrame(results).set_index("dataset")
@@ -0,0 +1,242 @@
+import numpy as np
+import pandas as pd
+
+#the variables of gm_simulation aggregated for every iteration
+VARIABLES = ("theta", "mu", "ask", "bid", "spread")
+
+#theta is a probability, so its range is known before any path is seen
+DEFAULTBOUNDS = {"theta": (0, 1)}
+
+
+class PathAggregator:
+    """Aggregates simulated paths as they are produced. For every iteration the aggregator keeps running
+    means and variances, and a histogram sketch used to estimate quantiles, so memory is proportional
+    to the number of iterations and not to the number of paths."""
+
+    def __init__(self, iterations, variables=VARIABLES, bins=256, bounds=None):
+        """__init__ constructor for PathAggregator class
+
+        Args:
+            iterations (int): maximum number of iterations of a path
+            variables (tuple): names of the variables aggregated for every iteration. Default VARIABLES
+            bins (int): number of bins in the histogram sketch of each iteration. Must be even. Default 256
+            bounds (dict): variable names as keys and (lower, upper) tuples as values. The initial range of the histogram sketch,
+                           which is doubled when values outside the range are added. Default None uses DEFAULTBOUNDS, and the range
+                           of the first batch with 10% margin for other variables
+        """
+
+        self.iterations = iterations
+        self.variables = tuple(variables)
+        self.bins = bins
+        self.bounds = dict(DEFAULTBOUNDS)
+        self.bounds.update(bounds or {})
+
+        #running count, mean and sum of squared deviations for every variable and iteration. Variables can have
+        #missing values in different iterations, so every variable has its own count
+        self.counts = {variable: np.zeros(iterations, dtype=np.int64) for variable in self.variables}
+        self.means = {variable: np.zeros(iterations) for variable in self.variables}
+        self.m2 = {variable: np.zeros(iterations) for variable in self.variables}
+
+        #histogram sketch, minimum and maximum for every variable and iteration. The counts of the sketch are fractional
+        #after aggregators with different ranges are merged
+        self.histograms = {variable: np.zeros((iterations, bins)) for variable in self.variables}
+        self.minimum = {variable: np.full(iterations, np.inf) for variable in self.variables}
+        self.maximum = {variable: np.full(iterations, -np.inf) for variable in self.variables}
+
+        #the values dictionaries returned by gm_simulation. Running sums of each key and the distribution of the equilibrium period
+        self.paths = 0
+        self.valuesums = {}
+        self.equilibriumcounts = np.zeros(iterations, dtype=np.int64)
+
+    def _histogramrange(self, variable, data):
+        #Private method. Returns the range of the histogram sketch. The range is set the first time the variable is seen,
+        #and doubled until it contains the data. Doubling the range merges pairs of bins, so no counts are lost.
+        #data only holds the finite values
+        lower, upper = np.min(data), np.max(data)
+        if variable not in self.bounds:
+            margin = 0.1*(upper-lower) if upper > lower else max(abs(upper), 1.0)
+            self.bounds[variable] = (float(lower-margin), float(upper+margin))
+
+        low, high = self.bounds[variable]
+        while lower < low or upper > high:
+            merged = self.histograms[variable].reshape(self.iterations, self.bins//2, 2).sum(axis=2)
+            empty = np.zeros_like(merged)
+            if upper > high:
+                self.histograms[variable] = np.concatenate([merged, empty], axis=1)
+                high = high+(high-low)
+            else:
+                self.histograms[variable] = np.concatenate([empty, merged], axis=1)
+                low = low-(high-low)
+        self.bounds[variable] = (low, high)
+
+        return self.bounds[variable]
+
+    def addbatch(self, paths, values=None):
+        """Adds a batch of paths
+
+        Args:
+            paths (dict): variable names as keys and 2-D arrays with a row for every path and a column for every iteration as
+                          values. Iterations after the end of a path are NaN
+            values (list of dicts): values dictionaries of the paths, see gm_simulation. Default None
+        """
+
+        for variable in self.variables:
+            data = np.asarray(paths[variable], dtype=float)[:, :self.iterations]
+            valid = np.isfinite(data)
+            columns = data.shape[1]
+            if not valid.any():
+                continue
+
+            #combine the running moments with the moments of the batch
+            batchcount = valid.sum(axis=0)
+            batchmean = np.where(batchcount > 0, np.where(valid, data, 0).sum(axis=0)/np.maximum(batchcount, 1), 0)
+            batchm2 = np.where(valid, (data-batchmean)**2, 0).sum(axis=0)
+
+            count = self.counts[variable][:columns]
+            total = count+batchcount
+            delta = batchmean-self.means[variable][:columns]
+            share = np.where(total > 0, batchcount/np.maximum(total, 1), 0)
+            self.means[variable][:columns] += delta*share
+            self.m2[variable][:columns] += batchm2+delta**2*count*share
+            self.counts[variable][:columns] += batchcount
+
+            #count the values in the histogram sketch of their iteration
+            lower, upper = self._histogramrange(variable, data[valid])
+            rows, iteration = np.nonzero(valid)
+            positions = ((data[rows, iteration]-lower)/(upper-lower)*self.bins).astype(np.int64)
+            positions = np.minimum(positions, self.bins-1)
+            self.histograms[variable] += np.bincount(iteration*self.bins+positions, minlength=self.iterations*self.bins).reshape(self.iterations, self.bins)
+
+            self.minimum[variable][:columns] = np.fmin(self.minimum[variable][:columns], np.nanmin(np.where(valid, data, np.inf), axis=0))
+            self.maximum[variable][:columns] = np.fmax(self.maximum[variable][:columns], np.nanmax(np.where(valid, data, -np.inf), axis=0))
+
+        for pathvalues in values or []:
+            self.paths += 1
+            for key, value in pathvalues.items():
+                self.valuesums[key] = self.valuesums.get(key, 0.0)+value
+            if "Equilibrium period" in pathvalues:
+                self.equilibriumcounts[min(int(pathvalues["Equilibrium period"]), self.iterations-1)] += 1
+
+    def add(self, dataframe, values=None):
+        """Adds a single path returned by gm_simulation
+
+        Args:
+            dataframe (pandas dataframe): simulation data of the path
+            values (dictionary): parameter values from the final iteration of the path. Default None
+        """
+
+        self.addbatch({variable: dataframe[variable].to_numpy()[None, :] for variable in self.variables},
+                      None if values is None else [values])
+
+    def _rebin(self, histogram, bounds, newbounds):
+        #Private method. Moves a histogram sketch to a new range which contains the old range. The count of an old bin
+        #is split between the new bins it overlaps, as if the values were uniform within the bin
+        oldedges = np.linspace(bounds[0], bounds[1], self.bins+1)
+        newedges = np.linspace(newbounds[0], newbounds[1], self.bins+1)
+        overlap = np.minimum(oldedges[1:, None], newedges[None, 1:])-np.maximum(oldedges[:-1, None], newedges[None, :-1])
+        weights = np.clip(overlap, 0, None)/np.diff(oldedges)[:, None]
+        return histogram @ weights
+
+    def merge(self, other):
+        """Adds the paths aggregated by another PathAggregator with the same iterations and variables, e.g. from
+        another process. If the histogram sketches of a variable have different ranges, e.g. because the ranges were
+        found from the data, both are moved to a range containing both, which can move values by up to a bin. Pass the
+        same bounds to the constructor of both aggregators to merge the sketches exactly.
+
+        Args:
+            other (PathAggregator): the other aggregator
+        """
+
+        for variable in self.variables:
+            #bring the histogram sketches to a common range. A variable without a range has no values yet
+            otherhistogram = other.histograms[variable]
+            if variable in other.bounds:
+                if variable not in self.bounds:
+                    self.bounds[variable] = other.bounds[variable]
+                elif self.bounds[variable] != other.bounds[variable]:
+                    bounds = (min(self.bounds[variable][0], other.bounds[variable][0]),
+                              max(self.bounds[variable][1], other.bounds[variable][1]))
+                    self.histograms[variable] = self._rebin(self.histograms[variable], self.bounds[variable], bounds)
+                    otherhistogram = self._rebin(otherhistogram, other.bounds[variable], bounds)
+                    self.bounds[variable] = bounds
+            self.histograms[variable] = self.histograms[variable]+otherhistogram
+
+            count = self.counts[variable]
+            total = count+other.counts[variable]
+            share = np.where(total > 0, other.counts[variable]/np.maximum(total, 1), 0)
+            delta = other.means[variable]-self.means[variable]
+            self.means[variable] += delta*share
+            self.m2[variable] += other.m2[variable]+delta**2*count*share
+            self.counts[variable] = total
+            self.minimum[variable] = np.fmin(self.minimum[variable], other.minimum[variable])
+            self.maximum[variable] = np.fmax(self.maximum[variable], other.maximum[variable])
+
+        self.paths += other.paths
+        for key, value in other.valuesums.items():
+            self.valuesums[key] = self.valuesums.get(key, 0.0)+value
+        self.equilibriumcounts += other.equilibriumcounts
+
+    def mean(self, variable):
+        """Returns the mean of a variable for every iteration. NaN for iterations no path reached"""
+        return np.where(self.counts[variable] > 0, self.means[variable], np.nan)
+
+    def variance(self, variable):
+        """Returns the sample variance of a variable for every iteration. NaN for iterations reached by less than two paths"""
+        count = self.counts[variable]
+        return np.where(count > 1, self.m2[variable]/np.maximum(count-1, 1), np.nan)
+
+    def quantile(self, variable, q):
+        """Estimates a quantile of a variable for every iteration from the histogram sketch. The estimate is
+        interpolated within a bin, so the error is at most the width of a bin.
+
+        Args:
+            variable (string): name of the variable
+            q (float): the quantile, between 0 and 1
+
+        Returns:
+            quantiles (numpy array): estimated quantile for every iteration. NaN for iterations no path reached
+        """
+
+        histogram = self.histograms[variable]
+        lower, upper = self.bounds.get(variable, (0, 1))
+        width = (upper-lower)/self.bins
+
+        #find the first bin where the cumulative count reaches the target, and interpolate within the bin
+        cumulative = np.cumsum(histogram, axis=1)
+        count = self.counts[variable]
+        target = q*count
+        position = np.argmax(cumulative >= target[:, None], axis=1)
+        rows = np.arange(self.iterations)
+        incount = histogram[rows, position]
+        before = cumulative[rows, position]-incount
+        fraction = np.where(incount > 0, (target-before)/np.where(incount > 0, incount, 1), 0)
+        estimate = lower+(position+fraction)*width
+
+        #the estimate can not be outside the observed values
+        estimate = np.clip(estimate, self.minimum[variable], self.maximum[variable])
+        return np.where(count > 0, estimate, np.nan)
+
+    def valuemeans(self):
+        """Returns the mean of the values dictionaries of the added paths, as numericalsolution in the notebook"""
+        return {key: value/self.paths for key, value in self.valuesums.items()} if self.paths > 0 else {}
+
+    def summary(self, quantiles=(0.05, 0.5, 0.95)):
+        """Creates a dataframe with the aggregated statistics of every iteration
+
+        Args:
+            quantiles (tuple): quantiles estimated for every variable. Default (0.05, 0.5, 0.95)
+
+        Returns:
+            dataframe (pandas dataframe): Iteration and paths columns, and the mean, standard deviation and quantiles of every variable.
+                                          paths is the largest number of values of a variable in the iteration
+        """
+
+        paths = np.max([self.counts[variable] for variable in self.variables], axis=0)
+        dataframe = pd.DataFrame({"Iteration": np.arange(self.iterations), "paths": paths})
+        for variable in self.variables:
+            dataframe[variable+"_mean"] = self.mean(variable)
+            dataframe[variable+"_std"] = np.sqrt(self.variance(variable))
+            for q in quantiles:
+                dataframe[variable+"_q"+format(q*100, "g")] = self.quantile(variable, q)
+
+        return dataframe
@@ -29,155 +29,538 @@ def gm_simulation(distribution=(0,1), decision="v_h", ratio=0.2, uninformed=0.5,
         values (dictionary): dictionary containing parameter values from the final iteration.
     """
     
+    #the simulation data is collected from the stream of trades, which draws from the global random state
+    np.random.seed(seed)
+    stream = gm_stream(distribution=distribution, decision=decision, ratio=ratio, uninformed=uninformed,
+                       startvalue=startvalue, iterations=iterations, random=np.random,
+                       shockperiod=shockperiod, shock=shock)
+    
+    #allocate space to save simulation data
+    values={}
+    records = []
+    
+    #simulation loop
+    for record in stream:
+        records.append(record)
+        
+        #save values and break loop if threshold or maximum iteration is reached
+        if record["spread"]<epsilon or record["iteration"] == iterations-1:
+            values.update({"Theta": record["posterior"],"Bid": record["bid"], "Ask": record["ask"], 
+                           "Mu": record["mu"], "Equilibrium period": record["iteration"]})
+            break
+    stream.close()
+            
+    #adding all simulation data to single dataframe
+    dataframe = pd.DataFrame()
+    dataframe["Iteration"] = [record["iteration"] for record in records]
+    dataframe["ratio"] = str(ratio)
+    dataframe["startvalue"] = str(startvalue)
+    for column in ["theta", "mu", "ask", "bid", "spread", "trader", "order"]:
+        dataframe[column] = np.array([record[column] for record in records], dtype=float)
+    
+    return dataframe, values
+
+
+def _applyshock(shock, decision, realized, v_l, v_h):
+    #Private function. Applies a shock and returns the new realized value type and distribution of the security.
+    #A private shock changes the realized value, and a public shock changes the distribution
+    if shock == {} or shock is None:
+        return realized, v_l, v_h
+    
+    if "Public" in shock:
+        v_l, v_h = shock["Public"]
+        realized = decision
+    if "Private" in shock:
+        if shock["Private"]==1:
+            realized = "v_h"
+        if shock["Private"]==0:
+            realized = "v_l"
+    
+    return realized, v_l, v_h
+
+
+def gm_stream(distribution=(0,1), decision="v_h", ratio=0.2, uninformed=0.5, 
+              startvalue=0.5, iterations=None, seed=5000, random=None,
+              shockperiod=None, shock={}):
+    """Generator simulating a simple Glosten-Milgrom model one trade at a time. Yields a record for every trade, 
+    and runs until the maximum number of iterations is reached or the generator is closed. 
+    A shock can be injected between trades with send, e.g. stream.send({"Private": 0}). The shock
+    is applied before the next trade, which is returned by send.
+    
+    Args:
+        distribution (tuple): upper and lower value for the security. Default (0,1)
+        decision (string): selecting the true value of the security. Default "v_h". options = ("v_h", "v_l")
+        
+        ratio (float): Ratio of informed traders on the market. Default 0.2
+        uninformed (float): Chance to receieve buy order from uninformed trader. Default 0.5
+        startvalue (float): Dealer's start belief about the value of the security. Default 0.5
+        
+        iterations (int): Maximum number of iterations. Default None runs until the generator is closed
+        seed (int): Seed used to generate random numbers. Default 5000
+        random (numpy RandomState): random state used instead of seed, e.g. np.random for the global state. Default None
+        
+        shockperiod (int): Selects which iteration the shock is introduced. Default None
+        shock (dict): Type of shock introduced. Default {}
+        
+    Yields:
+        record (dictionary): iteration, trader, order, theta, posterior, mu, ask, bid and spread of the trade.
+                             theta is the dealer's belief before the trade, and posterior the belief after the trade
+    """
+    
     #setting values
     v_l, v_h = distribution
     pi = ratio
     beta_b = uninformed
     beta_s = 1-beta_b
-    shock = shock
+    random = random if random is not None else np.random.RandomState(seed)
     
-    #determine realized value of v
-    v = decision
-    
-    #allocate space to save simulation data
-    values={}
-    ratiovalues = []
-    iteration = []
-    startvalues = []
-    thetavalues = np.empty(iterations)
-    muvalues = np.empty(iterations)
-    askvalues = np.empty(iterations)
-    bidvalues = np.empty(iterations)
-    gapvalues = np.empty(iterations)
-    pivalues = np.empty(iterations)
-    decisionvalues = np.empty(iterations)
-    
-    #saving startvalue of dealer beliefs
-    thetavalues[0]=startvalue
+    #determine realized value type of v
+    realized = decision
     
     #setting simulation settings
     theta_t1 = startvalue
-    N = iterations
-    np.random.seed(seed)
-    
-    #setting break index
-    break_index = 0
+    d_t = 0
+    injected = None
+    i = 0
     
     #simulation loop
-    for i in range(N):
+    while iterations is None or i < iterations:
         
-        #check if in shockperiod
+        #apply the shock of the shockperiod and shocks injected with send
         if i==shockperiod:
-            if shock != {}:
-                
-                #apply changes if shock is private only
-                if "Public" not in shock:
-                    if shock["Private"]==1:
-                        v="v_h"
-                    if shock["Private"]==0:
-                        v="v_l"
-                
-                #apply changes if shock is public only
-                elif "Private" not in shock:
-                    v_l, v_h = shock["Public"] 
-                    v = decision
-                
-                #apply changes if shock is public and private
-                else:
-                    v_l, v_h = shock["Public"]
-                    if shock["Private"]==1:
-                        v="v_h"
-                    if shock["Private"]==0:
-                        v="v_l"
+            realized, v_l, v_h = _applyshock(shock, decision, realized, v_l, v_h)
+        if injected is not None:
+            realized, v_l, v_h = _applyshock(injected, decision, realized, v_l, v_h)
         
         #get v value from v_h or v_l
-        if v=="v_h":
-            v=v_h
-        elif v=="v_l":
-            v=v_l
+        v = v_h if realized=="v_h" else v_l
             
         #calculate expected value of security
         mu_t1 = theta_t1*v_h+(1-theta_t1)*v_l
-        muvalues[i] = mu_t1
         
         #calculate markup/discount
         s_a = (pi*theta_t1*(1-theta_t1))/(pi*theta_t1+(1-pi)*beta_b)*(v_h-v_l)
         s_b = (pi*theta_t1*(1-theta_t1))/(pi*(1-theta_t1)+(1-pi)*beta_s)*(v_h-v_l)
         
-        #calculate ask/bid price
-        askvalues[i] = a_t = mu_t1 + s_a
-        bidvalues[i] = b_t = mu_t1 - s_b 
-        
-        #calculate gap
-        gapvalues[i] = gap_t = a_t - b_t
+        #calculate ask/bid price and gap
+        a_t = mu_t1 + s_a
+        b_t = mu_t1 - s_b 
+        gap_t = a_t - b_t
         
         #determine trader type
-        trader = np.random.binomial(1,pi)
-        pivalues[i] = trader
+        trader = random.binomial(1,pi)
         
-        #Determine order type if trader is informed
+        #Determine order type if trader is informed. If the informed trader does not trade, the previous order is kept
         if trader == 1:
-
             if v == v_h:
                 if v_h>a_t:
                     d_t=1
-                    
             elif v == v_l:
                 if v_l<b_t:
                     d_t=-1
-                    
             else:
                 d_t=0
                     
-        #determine order type if trader is uninformed
+        #determine order type if trader is uninformed by a random draw
         if trader == 0:
-            
-            #random draw of ordertype
-            buysell = np.random.binomial(1,beta_b)
+            buysell = random.binomial(1,beta_b)
             if buysell == 1:
                 d_t = 1
             else:
                 d_t = -1
         
-        decisionvalues[i] = d_t
-        
         #update beliefs depending on order type
         if d_t == 1:
             theta_t = ((1+pi)*beta_b)/(pi*theta_t1+(1-pi)*beta_b)*theta_t1
-            theta_t1 = theta_t
-            
         elif d_t == -1:
             theta_t = ((1-pi)*beta_b)/(pi*(1-theta_t1)+(1-pi)*beta_b)*theta_t1
-            theta_t1 = theta_t
+        else:
+            theta_t = theta_t1
         
-        #saving theta values with lag of 1
-        if i<iterations-1:
-            thetavalues[i+1] = theta_t
+        injected = yield {"iteration": i, "trader": trader, "order": d_t, "theta": theta_t1, "posterior": theta_t,
+                          "mu": mu_t1, "ask": a_t, "bid": b_t, "spread": gap_t}
         
-        #saving ratio and iteration values
-        ratiovalues.append(str(ratio))
-        iteration.append(int(i))
-        startvalues.append(str(startvalue))
+        theta_t1 = theta_t
+        i += 1
+
+
+async def gm_ticker(stream, tickrate, shocks=None):
+    """Asynchronous iterator yielding the records of a gm_stream at a steady tick rate, e.g. for a live replay.
+    
+    Args:
+        stream (generator): stream of trades, see gm_stream
+        tickrate (float): number of trades per second
+        shocks (asyncio Queue): queue of shocks. Shocks in the queue are injected before the next trade. Default None
         
-        #off by one error
-        break_index=i+1
+    Yields:
+        record (dictionary): record of the trade, see gm_stream
+    """
+    import asyncio
+    
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    shock = None
+    tick = 0
+    
+    while True:
         
-        #save values and break loop if threshold or maximum iteration is reached
-        if gap_t<epsilon or i == N-1:
-            values.update({"Theta": theta_t,"Bid": b_t, "Ask": (a_t), "Mu": mu_t1, "Equilibrium period": break_index-1})
+        #inject the queued shocks. If more than one shock is queued, they are applied in order
+        try:
+            record = next(stream) if shock is None else stream.send(shock)
+        except StopIteration:
+            return
+        shock = None
+        while shocks is not None and not shocks.empty():
+            queued = shocks.get_nowait()
+            shock = queued if shock is None else dict(shock, **queued)
+        
+        yield record
+        
+        #wait until the next tick. The ticks are scheduled from the start, so delays do not accumulate
+        tick += 1
+        await asyncio.sleep(max(start+tick/tickrate-loop.time(), 0))
+
+
+def multivalue_quotes(beliefs, values, ratio=0.2, uninformed=0.5):
+    """Calculates the dealer's ask and bid prices for a security with a discrete distribution of values.
+    Informed traders buy if the value is above the ask and sell if it is below the bid, so the ask is the
+    expected value given a buy when informed traders buy above the ask, and likewise for the bid.
+    Every possible cutoff is evaluated at once with cumulative sums, and the consistent cutoff is chosen.
+    
+    Args:
+        beliefs (numpy array): dealer's beliefs with a row for every path and a column for every value. Rows sum to 1
+        values (numpy array): possible values of the security, sorted in increasing order
+        ratio (float): Ratio of informed traders on the market. Default 0.2
+        uninformed (float): Chance to receieve buy order from uninformed trader. Default 0.5
+        
+    Returns:
+        mu (numpy array): expected value of the security for every path
+        ask (numpy array): ask price for every path
+        bid (numpy array): bid price for every path
+    """
+    
+    pi = ratio
+    beta_b = uninformed
+    beta_s = 1-beta_b
+    weighted = beliefs*values
+    mu = weighted.sum(axis=1)
+    zeros = np.zeros((len(beliefs), 1))
+    
+    #ask for every cutoff j, where informed traders buy if the value has index j or above
+    abovebeliefs = np.concatenate([np.cumsum(beliefs[:, ::-1], axis=1)[:, ::-1], zeros], axis=1)
+    abovevalues = np.concatenate([np.cumsum(weighted[:, ::-1], axis=1)[:, ::-1], zeros], axis=1)
+    asks = (pi*abovevalues+(1-pi)*beta_b*mu[:, None])/(pi*abovebeliefs+(1-pi)*beta_b)
+    
+    #the consistent cutoff is the first, where the ask is below the value at the cutoff
+    cutoffvalues = np.append(values, np.inf)
+    ask = asks[np.arange(len(beliefs)), np.argmax(asks < cutoffvalues, axis=1)]
+    
+    #bid for every cutoff j, where informed traders sell if the value has index below j
+    belowbeliefs = np.concatenate([zeros, np.cumsum(beliefs, axis=1)], axis=1)
+    belowvalues = np.concatenate([zeros, np.cumsum(weighted, axis=1)], axis=1)
+    bids = (pi*belowvalues+(1-pi)*beta_s*mu[:, None])/(pi*belowbeliefs+(1-pi)*beta_s)
+    
+    #the consistent cutoff is the last, where the bid is above the value below the cutoff
+    cutoffvalues = np.insert(values, 0, -np.inf)
+    consistent = bids > cutoffvalues
+    bid = bids[np.arange(len(beliefs)), len(values)-np.argmax(consistent[:, ::-1], axis=1)]
+    
+    return mu, ask, bid
+
+
+def gm_multivalue_simulation(values=(0,1), prior=None, truevalue=-1, ratio=0.2, uninformed=0.5,
+                             paths=1000, iterations=500, seed=5000, epsilon=10**-5):
+    """Simulates the Glosten-Milgrom model for many paths at once, with a security that has a discrete
+    distribution of K values. The dealer's belief is a probability vector, which is updated with Bayes
+    rule after every order. All paths are updated together, so the time per iteration grows with paths*K.
+    A path stops when the spread is below the threshold parameter.
+    
+    Args:
+        values (tuple): possible values of the security. Default (0,1)
+        prior (tuple): dealer's start belief about each value. Default None uses equal probabilities
+        truevalue (int): index in the sorted values of the true value of the security. Default -1 selects the highest value.
+                         None draws the true value of every path from the prior
+        
+        ratio (float): Ratio of informed traders on the market. Default 0.2
+        uninformed (float): Chance to receieve buy order from uninformed trader. Default 0.5
+        
+        paths (int): number of simulated paths. Default 1000
+        iterations (int): Maximum number of iterations run by the simulation. Default 500
+        seed (int): Seed used to generate random numbers. Default 5000
+        epsilon (float): Threshold parameter. Default 10**-5
+        
+    Returns:
+        data (dictionary): 2-D arrays with a row for every path and a column for every iteration for theta (the belief
+                           in the true value), mu, ask, bid, spread, trader and order. Iterations after a path has stopped
+                           are NaN, so data can be passed to PathAggregator.addbatch
+        values (dictionary): arrays with the final Theta, Bid, Ask, Mu and Equilibrium period of every path, and the final
+                             Beliefs of every path
+    """
+    
+    #sort the values and the prior together
+    order = np.argsort(values)
+    values = np.asarray(values, dtype=float)[order]
+    K = len(values)
+    prior = np.full(K, 1/K) if prior is None else np.asarray(prior, dtype=float)[order]/np.sum(prior)
+    pi = ratio
+    beta_b = uninformed
+    beta_s = 1-beta_b
+    random = np.random.default_rng(seed)
+    
+    #determine the true value of every path
+    if truevalue is None:
+        trueindex = random.choice(K, size=paths, p=prior)
+    else:
+        trueindex = np.full(paths, np.arange(K)[truevalue])
+    truevalues = values[trueindex]
+    
+    #allocate space to save simulation data
+    data = {key: np.full((paths, iterations), np.nan) for key in ["theta", "mu", "ask", "bid", "spread", "trader", "order"]}
+    beliefs = np.tile(prior, (paths, 1))
+    equilibrium = np.full(paths, iterations-1)
+    active = np.arange(paths)
+    
+    #simulation loop, over the paths which have not stopped
+    for i in range(iterations):
+        current = beliefs[active]
+        mu, ask, bid = multivalue_quotes(current, values, pi, beta_b)
+        
+        #informed traders buy above the ask and sell below the bid. Uninformed traders buy with probability beta_b
+        trader = random.random(len(active)) < pi
+        informedorder = np.where(truevalues[active] > ask, 1, np.where(truevalues[active] < bid, -1, 0))
+        uninformedorder = np.where(random.random(len(active)) < beta_b, 1, -1)
+        order = np.where(trader, informedorder, uninformedorder)
+        
+        #save the simulation data
+        data["theta"][active, i] = current[np.arange(len(active)), trueindex[active]]
+        data["mu"][active, i] = mu
+        data["ask"][active, i] = ask
+        data["bid"][active, i] = bid
+        data["spread"][active, i] = ask-bid
+        data["trader"][active, i] = trader
+        data["order"][active, i] = order
+        
+        #likelihood of the order for every value, and Bayes update of the beliefs
+        buylikelihood = pi*(values > ask[:, None])+(1-pi)*beta_b
+        selllikelihood = pi*(values < bid[:, None])+(1-pi)*beta_s
+        nonelikelihood = pi*((values >= bid[:, None]) & (values <= ask[:, None]))
+        likelihood = np.where((order == 1)[:, None], buylikelihood, np.where((order == -1)[:, None], selllikelihood, nonelikelihood))
+        posterior = current*likelihood
+        beliefs[active] = posterior/posterior.sum(axis=1, keepdims=True)
+        
+        #stop the paths where the threshold is reached
+        stopped = ask-bid < epsilon
+        equilibrium[active[stopped]] = i
+        active = active[~stopped]
+        if len(active) == 0:
             break
+    
+    #the final values of every path, from the iteration where the path stopped
+    rows = np.arange(paths)
+    finalvalues = {"Theta": beliefs[rows, trueindex], "Bid": data["bid"][rows, equilibrium], "Ask": data["ask"][rows, equilibrium],
+                   "Mu": data["mu"][rows, equilibrium], "Equilibrium period": equilibrium, "Beliefs": beliefs}
+    
+    return data, finalvalues
+
+
+def gm_event_simulation(distribution=(0,1), decision="v_h", informedrate=0.2, uninformedrate=0.8, uninformed=0.5,
+                        startvalue=0.5, horizon=1000.0, seed=5000, epsilon=None, shocks=None):
+    """Simulates the Glosten-Milgrom model in continuous time. Informed and uninformed orders arrive as Poisson
+    processes with their own rates, and the dealer sets quotes with the spread formulas of gm_simulation, where the
+    ratio of informed traders is the share of the informed rate in the total rate.
+    
+    Scheduled events (shocks and the end of the simulation) are processed from a priority queue. The orders
+    arriving between two scheduled events are drawn and processed at once: the dealer's belief after each order
+    follows from the cumulative sum of the log likelihood ratios of the orders, so there is no loop over orders.
+    
+    Args:
+        distribution (tuple): upper and lower value for the security. Default (0,1)
+        decision (string): selecting the true value of the security. Default "v_h". options = ("v_h", "v_l")
+        
+        informedrate (float): arrival rate of informed traders per unit of time. Default 0.2
+        uninformedrate (float): arrival rate of uninformed traders per unit of time. Default 0.8
+        uninformed (float): Chance to receieve buy order from uninformed trader. Default 0.5
+        startvalue (float): Dealer's start belief about the value of the security. Default 0.5
+        
+        horizon (float): length of the simulated time. Default 1000.0
+        seed (int): Seed used to generate random numbers. Default 5000
+        epsilon (float): Threshold parameter. The simulation stops at the first order where the spread is below epsilon. Default None
+        
+        shocks (list): (time, shock) tuples, where shock is a dictionary as in gm_simulation. A shock may also contain
+                       "Rates": (informedrate, uninformedrate) to change the arrival rates. Default None
+        
+    Returns:
+        dataframe (pandas dataframe): dataframe with a row for every order, containing the arrival time, trader, order,
+                                      the dealer's belief before the order and the quotes
+        values (dictionary): dictionary containing parameter values from the final order.
+    """
+    import heapq
+    
+    #setting values
+    v_l, v_h = distribution
+    beta_b = uninformed
+    beta_s = 1-beta_b
+    realized = decision
+    random = np.random.default_rng(seed)
+    
+    #the dealer's belief is kept as log odds, so Bayes rule becomes a sum
+    logodds = np.log(startvalue)-np.log1p(-startvalue)
+    
+    #priority queue of scheduled events. The sequence number keeps events at the same time in order
+    events = [(float(horizon), 0, "end", None)]
+    for sequence, (time, shock) in enumerate(shocks or []):
+        events.append((float(time), sequence+1, "shock", shock))
+    heapq.heapify(events)
+    
+    #simulation data is saved in blocks, one block for each period between scheduled events
+    blocks = []
+    now = 0.0
+    
+    while events:
+        time, sequence, kind, shock = heapq.heappop(events)
+        time = min(time, horizon)
+        
+        #draw the orders arriving before the event. The number of orders is Poisson distributed and the arrival
+        #times are uniformly distributed, which is the same as drawing exponential waiting times
+        totalrate = informedrate+uninformedrate
+        count = random.poisson(totalrate*(time-now)) if time > now and totalrate > 0 else 0
+        if count > 0:
+            pi = informedrate/totalrate
+            arrivals = np.sort(random.uniform(now, time, count))
+            trader = random.random(count) < pi
+            
+            #informed traders trade on the realized value, uninformed traders buy with probability beta_b
+            informedorder = 1 if realized=="v_h" else -1
+            order = np.where(trader, informedorder, np.where(random.random(count) < beta_b, 1, -1))
+            
+            #log likelihood ratio of a buy and a sell, and the belief before each order
+            buyratio = np.log(pi+(1-pi)*beta_b)-np.log((1-pi)*beta_b)
+            sellratio = np.log((1-pi)*beta_s)-np.log(pi+(1-pi)*beta_s)
+            cumulative = logodds+np.cumsum(np.where(order == 1, buyratio, sellratio))
+            before = np.concatenate([[logodds], cumulative[:-1]])
+            theta = 1/(1+np.exp(-before))
             
+            #calculate expected value, markup/discount and quotes
+            mu = theta*v_h+(1-theta)*v_l
+            s_a = (pi*theta*(1-theta))/(pi*theta+(1-pi)*beta_b)*(v_h-v_l)
+            s_b = (pi*theta*(1-theta))/(pi*(1-theta)+(1-pi)*beta_s)*(v_h-v_l)
+            block = pd.DataFrame({"time": arrivals, "trader": trader.astype(float), "order": order.astype(float), 
+                                  "theta": theta, "posterior": 1/(1+np.exp(-cumulative)),
+                                  "mu": mu, "ask": mu+s_a, "bid": mu-s_b, "spread": s_a+s_b})
+            logodds = cumulative[-1]
+            
+            #stop at the first order where the threshold is reached
+            if epsilon is not None and (block["spread"] < epsilon).any():
+                blocks.append(block.iloc[:int(np.argmax(block["spread"].to_numpy() < epsilon))+1])
+                break
+            blocks.append(block)
+        now = time
+        
+        #apply the scheduled event
+        if kind == "end":
+            break
+        realized, v_l, v_h = _applyshock({key: value for key, value in shock.items() if key != "Rates"}, decision, realized, v_l, v_h)
+        if "Rates" in shock:
+            informedrate, uninformedrate = shock["Rates"]
+    
     #adding all simulation data to single dataframe
-    dataframe = pd.DataFrame()
-    dataframe["Iteration"] = iteration
-    dataframe["ratio"] = ratiovalues
-    dataframe["startvalue"] = startvalues
-    dataframe["theta"] = thetavalues[0:break_index]
-    dataframe["mu"] = muvalues[0:break_index]
-    dataframe["ask"] = askvalues[0:break_index]
-    dataframe["bid"] = bidvalues[0:break_index]
-    dataframe["spread"] = gapvalues[0:break_index]
-    dataframe["trader"] = pivalues[0:break_index]
-    dataframe["order"] = decisionvalues[0:break_index]
-    
-    return dataframe, values
\ No newline at end of file
+    columns = ["time", "trader", "order", "theta", "posterior", "mu", "ask", "bid", "spread"]
+    dataframe = pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame(columns=columns)
+    dataframe.insert(0, "Iteration", np.arange(len(dataframe)))
+    
+    values = {}
+    if len(dataframe) > 0:
+        last = dataframe.iloc[-1]
+        values.update({"Theta": float(last["posterior"]), "Bid": float(last["bid"]), "Ask": float(last["ask"]), "Mu": float(last["mu"]), 
+                       "Equilibrium period": int(last["Iteration"]), "Equilibrium time": float(last["time"])})
+    
+    return dataframe, values
+
+
+def gm_market_simulation(distribution=(0,1), decision="v_h", ratio=0.2, uninformed=0.5, startvalue=0.5,
+                         iterations=500, seed=5000, epsilon=10**-5, correlation=0.0):
+    """Simulates a market of many securities, each with its own dealer, as gm_simulation. The parameters can be
+    given for every security as arrays, and the beliefs of all dealers are updated together in every iteration.
+    The arrival of informed traders can be correlated across the securities. With probability correlation,
+    the trader type of every security is drawn from one common random number in an iteration. For securities
+    with the same ratio, the correlation of the informed arrivals is then equal to correlation.
+    
+    Args:
+        distribution (tuple or array): upper and lower value of every security, with shape (2,) or (securities, 2). Default (0,1)
+        decision (string or array): selecting the true value of every security. Default "v_h". options = ("v_h", "v_l")
+        
+        ratio (float or array): Ratio of informed traders on the market of every security. Default 0.2
+        uninformed (float or array): Chance to receieve buy order from uninformed trader. Default 0.5
+        startvalue (float or array): Dealer's start belief about the value of every security. Default 0.5
+        
+        iterations (int): Maximum number of iterations run by the simulation. Default 500
+        seed (int): Seed used to generate random numbers. Default 5000
+        epsilon (float): Threshold parameter. Default 10**-5
+        correlation (float): probability that the trader types of an iteration are drawn from a common random number. Default 0.0
+        
+    Returns:
+        data (dictionary): 2-D arrays with a row for every security and a column for every iteration for theta, mu, ask, bid,
+                           spread, trader and order. Iterations after the threshold is reached are NaN
+        values (dictionary): arrays with the final Theta, Bid, Ask, Mu and Equilibrium period of every security
+    """
+    
+    #broadcast the parameters to arrays with a value for every security
+    distribution = np.asarray(distribution, dtype=float).reshape(-1, 2)
+    decision = np.asarray(decision)
+    pi, beta_b, theta, v_l, v_h, decision = np.broadcast_arrays(np.asarray(ratio, dtype=float), np.asarray(uninformed, dtype=float),
+                                                                np.asarray(startvalue, dtype=float), distribution[:, 0],
+                                                                distribution[:, 1], decision.reshape(-1))
+    securities = len(pi)
+    beta_s = 1-beta_b
+    theta = theta.copy()
+    v = np.where(decision=="v_h", v_h, v_l)
+    random = np.random.default_rng(seed)
+    
+    #allocate space to save simulation data
+    data = {key: np.full((securities, iterations), np.nan) for key in ["theta", "mu", "ask", "bid", "spread", "trader", "order"]}
+    order = np.zeros(securities)
+    periods = np.full(securities, iterations-1)
+    active = np.ones(securities, dtype=bool)
+    
+    #simulation loop
+    for i in range(iterations):
+        
+        #calculate expected value, markup/discount, ask/bid price and gap
+        mu = theta*v_h+(1-theta)*v_l
+        s_a = (pi*theta*(1-theta))/(pi*theta+(1-pi)*beta_b)*(v_h-v_l)
+        s_b = (pi*theta*(1-theta))/(pi*(1-theta)+(1-pi)*beta_s)*(v_h-v_l)
+        ask = mu+s_a
+        bid = mu-s_b
+        
+        #draw the trader types. The common random number is used by every security in correlated iterations
+        draws = random.random(securities)
+        if correlation > 0 and random.random() < correlation:
+            draws[:] = random.random()
+        trader = draws < pi
+        
+        #informed traders trade if the value is outside the quotes, and otherwise the previous order is kept
+        informedorder = np.where((v == v_h) & (v_h > ask), 1, np.where((v == v_l) & (v_l < bid), -1, order))
+        order = np.where(trader, informedorder, np.where(random.random(securities) < beta_b, 1, -1))
+        
+        #save the simulation data of the securities which have not reached the threshold
+        for key, value in (("theta", theta), ("mu", mu), ("ask", ask), ("bid", bid), ("spread", ask-bid), ("trader", trader), ("order", order)):
+            data[key][active, i] = value[active]
+        
+        #update beliefs depending on order type
+        buytheta = ((1+pi)*beta_b)/(pi*theta+(1-pi)*beta_b)*theta
+        selltheta = ((1-pi)*beta_b)/(pi*(1-theta)+(1-pi)*beta_b)*theta
+        theta = np.where(active, np.where(order == 1, buytheta, np.where(order == -1, selltheta, theta)), theta)
+        
+        #stop the securities where the threshold is reached
+        stopped = active & (ask-bid < epsilon)
+        periods[stopped] = i
+        active &= ~stopped
+        if not active.any():
+            break
+    
+    #the final values of every security, from the iteration where the threshold was reached
+    rows = np.arange(securities)
+    values = {"Theta": theta, "Bid": data["bid"][rows, periods], "Ask": data["ask"][rows, periods],
+              "Mu": data["mu"][rows, periods], "Equilibrium period": periods}
+    
+    return data, values
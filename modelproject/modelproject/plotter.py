@@ -1,13 +1,45 @@
-#importing necessary libraries.
-import tkinter as tk
-import pandas as pd 
-import numpy as np 
-import matplotlib
-matplotlib.use("TkAgg")
-from matplotlib import pyplot as plt
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
-from mpl_finance import candlestick_ochl
+#importing necessary libraries. The tkinter and matplotlib modules are imported when a window or figure is
+#created, so the module can be imported on machines without a display, e.g. by the exportfigures worker processes.
+import os
+import re
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+def decimate(x, y, buckets, reduce="minmax"):
+    """Downsamples a series to a number of buckets, e.g. one bucket per pixel. Each bucket is
+    replaced by its minimum and/or maximum, so the drawn line keeps the envelope of the series.
+
+    Args:
+        x (numpy array): horizontal values, sorted
+        y (numpy array): vertical values
+        buckets (int): number of buckets
+        reduce (string): values kept for each bucket. Default "minmax". options = ("minmax", "min", "max")
+
+    Returns:
+        x (numpy array): horizontal values of the downsampled series
+        y (numpy array): vertical values of the downsampled series
+    """
+
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+
+    #short series are returned as they are
+    if len(y) <= 2*buckets:
+        return x, y
+
+    #find the first position in each bucket and reduce each bucket, ignoring NaN
+    starts = np.linspace(0, len(y), buckets+1).astype(np.intp)[:-1]
+    if reduce == "min":
+        return x[starts], np.fmin.reduceat(y, starts)
+    if reduce == "max":
+        return x[starts], np.fmax.reduceat(y, starts)
+
+    #draw a vertical line from the minimum to the maximum of each bucket
+    ymin = np.fmin.reduceat(y, starts)
+    ymax = np.fmax.reduceat(y, starts)
+    return np.repeat(x[starts], 2), np.column_stack((ymin, ymax)).ravel()
+
 
 class DataPlotter:
     """Creates a figure with subplots"""
@@ -21,6 +53,7 @@ class DataPlotter:
         
         self.fig = figure
         self.subplots = {}
+        self.lines = {}
     
     def addlineplot(self,data,plotname,**kwargs):
         """Creates a line subplot for the dataplotter figure based on the data. 1st column
@@ -55,6 +88,9 @@ class DataPlotter:
             data (Pandas DataFrame): 2-column dataframe. 
             plotname (String): Name for the subplot
         """
+        #mpl_finance is only needed for candlestick plots
+        from mpl_finance import candlestick_ochl
+
         #constructing the candlestick plot
         currentplot = self.fig.add_subplot(1,1,1)
         candlestick_ochl(currentplot,data,colorup="g")
@@ -64,27 +100,162 @@ class DataPlotter:
         #Add the subplot to the subplot dictionary
         self.subplots[plotname]=currentplot
     
+    def setlineplot(self, x, y, plotname, linename, buckets=None, reduce="minmax", **kwargs):
+        """Creates a line in a subplot, or updates the data of the line if it already exists. The line
+        is animated, so it can be blitted on the canvas without redrawing the subplot.
+
+        Args:
+            x (numpy array): horizontal values
+            y (numpy array): vertical values
+            plotname (String): Name for the subplot
+            linename (String): Name for the line
+            buckets (int): downsample the line to this number of buckets, see decimate. Default None
+            reduce (string): values kept for each bucket, see decimate. Default "minmax"
+            **kwargs: kwargs for the pyplot.plot method used to construct the line.
+
+        Returns:
+            line (Matplotlib Line2D): the created or updated line
+        """
+
+        #downsample the data
+        if buckets != None:
+            x, y = decimate(x, y, buckets, reduce)
+
+        #create the subplot the first time it is used
+        if plotname not in self.subplots:
+            currentplot = self.fig.add_subplot(1,1,1)
+            currentplot.set_xlabel("Iteration")
+            currentplot.grid(True)
+            self.subplots[plotname] = currentplot
+
+        #reuse the line if it exists
+        if (plotname, linename) in self.lines:
+            line = self.lines[(plotname, linename)]
+            line.set_data(x, y)
+        else:
+            line, = self.subplots[plotname].plot(x, y, label=linename, animated=True, **kwargs)
+            self.subplots[plotname].legend()
+            self.lines[(plotname, linename)] = line
+
+        return line
+
     def figuretitle(self, figuretitle):
         """Sets the figure title
 
         Args:
             figuretitle (string): desired name of the figure
+
+        Returns:
+            title (Matplotlib Text): the figure title
         """
         #set figure suptitle
-        self.fig.suptitle(figuretitle)
+        return self.fig.suptitle(figuretitle)
 
     def clearplots(self):
         """Clear the figure and subplots"""
-        #clearing figure and subplot dictionary
+        #clearing figure, subplot and line dictionary
         self.fig.clear()
         self.subplots.clear()
+        self.lines.clear()
+
+
+
+def drawslice(plotter, data, graphtype, xvariable, yvariablelist):
+    """Adds the subplots for a graphtype to a DataPlotter
+
+    Args:
+        plotter (DataPlotter): DataPlotter to add the subplots to
+        data (Pandas DataFrame): Dataframe containing a single slice of the data
+        graphtype (string): graph type used to plot data. options = ("candlestick", "piplot")
+        xvariable (string): name of column used as x variable in plot
+        yvariablelist (list of strings): name/s of column/s used as y variable/s in plot
+    """
+
+    #creates a linesubplot for each entry in yvariablelist
+    if graphtype=="piplot":
+        for index, yvariable in enumerate(yvariablelist):
+            plotter.addlineplot(data[[xvariable,yvariable]], "plot"+str(index+1))
+    
+    #creates a candlestick plot. Section is specifically made for the
+    #pirunmerged dataframe in modelprojekt.ipynb.
+    if graphtype=="candlestick":
+        #create an array with a row of (iteration, open, close, high, low) for each iteration
+        ochl = data[["Iteration", "bid", "ask", "ask", "bid"]].to_numpy(dtype=float)
+        
+        #create candlestick plot from ochl list
+        plotter.addcandlestick(ochl, "candlestick")
+
+        #add lineplot to figure if specified
+        if xvariable!=None and yvariablelist!= None:
+            for index, yvariable in enumerate(yvariablelist):
+                plotter.addlineplot(data[[xvariable,yvariable]],"lineplot"+str(index+1), color="#FFA500")
+
+
+def _exportslice(task):
+    #Private function. Renders a single slice with the Agg backend and saves it. Runs in the worker processes of exportfigures
+    graphnamekey, data, graphtype, xvariable, yvariablelist, path, figsize, dpi = task
+
+    #the Agg canvas renders the figure without a display
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    figure = Figure(figsize=figsize, dpi=dpi)
+    FigureCanvasAgg(figure)
+    plotter = DataPlotter(figure)
+    plotter.figuretitle(graphnamekey)
+    drawslice(plotter, data, graphtype, xvariable, yvariablelist)
+    figure.savefig(path)
+
+    return path
+
+
+def exportfigures(data, slicename, graphtype, folder, xvariable=None, yvariablelist=None, fileformat="png",
+                  processes=None, figsize=(12.8, 7.2), dpi=100):
+    """Saves a figure for every slicekey without opening a window. The figures are rendered in parallel
+    worker processes with the same layouts as PlotterWindow.
 
+    Args:
+        data (Pandas Dataframe): Dataframe used to create the plots
+        slicename (string): name of column used to get slicekeys
+        graphtype (string): graph type used to plot data. options = ("candlestick", "piplot")
+        folder (string): folder the figures are saved in. Created if it does not exist
+
+        xvariable (string): name of column used as x variable in plot. Default None
+        yvariablelist (list of strings): name/s of column/s used as y variable/s in plot. Default None
+        fileformat (string): file format of the figures. Default "png". options = ("png", "svg", "pdf")
+        processes (int): number of worker processes. Default None uses every cpu
+        figsize (tuple): size of the figures in inches. Default (12.8, 7.2)
+        dpi (int): resolution of the figures. Default 100
+
+    Returns:
+        paths (list of strings): paths to the saved figures, in the order of the slicekeys
+    """
+
+    os.makedirs(folder, exist_ok=True)
+
+    #only the plotted columns of each slice are sent to the worker processes
+    columns = [xvariable] + list(yvariablelist or [])
+    if graphtype=="candlestick":
+        columns += ["Iteration", "bid", "ask"]
+    columns = [column for column in dict.fromkeys(columns) if column != None]
+
+    tasks = []
+    for key, slicedata in data.groupby(slicename, sort=False, observed=True):
+        filename = re.sub(r"[^\w.-]+", "_", str(key)) + "." + fileformat
+        tasks.append((str(key), slicedata[columns], graphtype, xvariable, yvariablelist,
+                      os.path.join(folder, filename), figsize, dpi))
+
+    #render the figures in parallel. The tasks are sent in chunks to limit the overhead per figure
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(processes) as executor:
+        paths = list(executor.map(_exportslice, tasks, chunksize=max(1, len(tasks)//(4*processes))))
+
+    return paths
 
 
 class PlotterWindow:
     """Create a tk window containing a figure created with DataPlotter"""
 
-    def __init__(self, data, slicename, graphtype, xvariable=None, yvariablelist=None, xsize=1280, ysize=720):
+    def __init__(self, data, slicename, graphtype, xvariable=None, yvariablelist=None, xsize=1280, ysize=720, fastrender=False, cachesize=32):
         """__init__ constructor for PlotterWindow class
 
         Args:
@@ -96,6 +267,9 @@ class PlotterWindow:
             yvariablelist (list of strings): name/s of column/s used as y variable/s in plot. Default None
             xsize (int): Define width of tk window. Default 1280
             ysize (int): Define height of tk window Default 720
+            fastrender (bool): downsample the series to the width of the plot and blit reused lines on the canvas
+                               instead of redrawing the figure. The candlestick plot is drawn as the ask/bid envelope. Default False
+            cachesize (int): Number of sliced datasets kept in memory for reuse. Default 32
         """
         
         self.xsize = xsize
@@ -106,6 +280,25 @@ class PlotterWindow:
         self.graphtype = graphtype
         self.slicename = slicename
 
+        #group the row positions of every slicekey once, so a slice only touches its own rows. The keys are
+        #strings, since the graphmenu returns the slicekey as a string
+        self.sliceindex = {str(key): positions for key, positions in
+                           self.data.groupby(self.slicename, sort=False, observed=True).indices.items()}
+
+        #the columns used in the plots, and the least recently used cache of sliced datasets
+        plotcolumns = [self.xvariable] + list(self.yvariablelist or [])
+        if self.graphtype=="candlestick":
+            plotcolumns += ["Iteration", "bid", "ask"]
+        self.plotcolumns = [column for column in dict.fromkeys(plotcolumns) if column != None]
+        self.cachesize = cachesize
+        self.slicecache = OrderedDict()
+        self.fastrender = fastrender
+
+        #import the window and canvas libraries
+        import tkinter as tk
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+
         #create the tk window
         self.window = tk.Tk()
 
@@ -148,6 +341,12 @@ class PlotterWindow:
         #call instance of DataPlotter
         self.plotter = DataPlotter(self.figure)
 
+        #the animated artists are drawn on top of the saved background when the canvas is drawn
+        self.background = None
+        self.title = None
+        if self.fastrender:
+            self.canvas.mpl_connect("draw_event", lambda event: self._ondraw())
+
     def start(self):
         """Start the PlotterWindow"""
         self.window.mainloop()
@@ -155,12 +354,102 @@ class PlotterWindow:
     def _ongraphmenuchange(self):
         #Private method. Calls _updateplotter function and draws canvas in self.window
         
+        #the fast renderer draws the canvas itself
+        if self.fastrender:
+            self._updatefastplotter(self.currentslicekey.get())
+            return
+
         #call _updateplotter function
         self._updateplotter(self.currentslicekey.get())
         
         #draw canvas
         self.canvas.draw()
 
+    def _animatedartists(self):
+        #Private method. Returns the lines and title drawn by the fast renderer
+        artists = list(self.plotter.lines.values())
+        if self.title != None:
+            artists.append(self.title)
+        return artists
+
+    def _ondraw(self):
+        #Private method. Saves the background of the canvas and draws the animated artists on top of it
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self._animatedartists():
+            self.figure.draw_artist(artist)
+
+    def _updatefastplotter(self, graphnamekey):
+        #Private method. Updates the data of the existing lines, downsampled to the width of the plot, and blits
+        #them on the canvas. The figure is only redrawn if the axis limits change.
+
+        #slice data based on graphnamekey
+        newplotdata = self._getslice(graphnamekey)
+
+        #choose the lines to draw. The candlestick plot is drawn as the envelope of the ask and bid prices
+        if self.graphtype=="candlestick":
+            lines = [("Iteration", "ask", "max", "g"), ("Iteration", "bid", "min", "r")]
+            if self.xvariable!=None and self.yvariablelist!= None:
+                lines += [(self.xvariable, yvariable, "minmax", "#FFA500") for yvariable in self.yvariablelist]
+        else:
+            lines = [(self.xvariable, yvariable, "minmax", None) for yvariable in self.yvariablelist]
+
+        #update the lines. The first time the subplot is created, and its width is used as number of buckets
+        buckets = None
+        if "fastplot" in self.plotter.subplots:
+            buckets = max(1, int(self.plotter.subplots["fastplot"].bbox.width))
+        for xvariable, yvariable, reduce, color in lines:
+            x = newplotdata[xvariable].to_numpy()
+            y = newplotdata[yvariable].to_numpy(dtype=float)
+            kwargs = {} if color == None else {"color": color}
+            self.plotter.setlineplot(x, y, "fastplot", yvariable, buckets=buckets or 2000, reduce=reduce, **kwargs)
+
+        #update the title
+        if self.title == None:
+            self.title = self.plotter.figuretitle(graphnamekey)
+            self.title.set_animated(True)
+        else:
+            self.title.set_text(graphnamekey)
+
+        #find the limits of the new data
+        currentplot = self.plotter.subplots["fastplot"]
+        xdata = np.concatenate([np.asarray(line.get_xdata(), dtype=float) for line in self.plotter.lines.values()])
+        ydata = np.concatenate([np.asarray(line.get_ydata(), dtype=float) for line in self.plotter.lines.values()])
+        if len(xdata) == 0 or np.all(np.isnan(ydata)):
+            return
+        xlimits = (np.nanmin(xdata), np.nanmax(xdata))
+        ymargin = 0.05*(np.nanmax(ydata)-np.nanmin(ydata)) or 0.5
+        ylimits = (np.nanmin(ydata)-ymargin, np.nanmax(ydata)+ymargin)
+
+        #redraw the figure if the limits changed, otherwise blit the lines on the saved background
+        if self.background == None or xlimits != tuple(currentplot.get_xlim()) or ylimits != tuple(currentplot.get_ylim()):
+            if xlimits[0] != xlimits[1]:
+                currentplot.set_xlim(xlimits)
+            currentplot.set_ylim(ylimits)
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            for artist in self._animatedartists():
+                self.figure.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
+
+    def _getslice(self, graphnamekey):
+        #Private method. Returns the plotted columns of the rows with the slicekey graphnamekey. The most recently
+        #used slices are kept in self.slicecache
+        
+        if graphnamekey in self.slicecache:
+            self.slicecache.move_to_end(graphnamekey)
+            return self.slicecache[graphnamekey]
+
+        #take the rows of the slice from the grouped row positions
+        newplotdata = self.data.take(self.sliceindex[graphnamekey])[self.plotcolumns]
+        self.slicecache[graphnamekey] = newplotdata
+
+        #remove the least recently used slice if the cache is full
+        if len(self.slicecache) > self.cachesize:
+            self.slicecache.popitem(last=False)
+
+        return newplotdata
+
     def _updateplotter(self, graphnamekey):
         #Private method. Clears self.figure and add new subplots to self.figure.
 
@@ -170,36 +459,7 @@ class PlotterWindow:
         self.plotter.figuretitle(graphnamekey)
 
         #slice data based on graphnamekey 
-        newplotdata = self.data.loc[self.data[self.slicename] == graphnamekey,:]
+        newplotdata = self._getslice(graphnamekey)
 
-        #creates a linesubplot for each entry in yvariablelist
-        if self.graphtype=="piplot":
-            for index, yvariable in enumerate(self.yvariablelist):
-                self.plotter.addlineplot(newplotdata[[self.xvariable,yvariable]], "plot"+str(index+1))
-        
-        #creates a candlestick plot. Section is specifically made for the
-        #pirunmerged dataframe in modelprojekt.ipynb.
-        if self.graphtype=="candlestick":
-            #define lower and upper range
-            lower = 0
-            upper = len(list(newplotdata["bid"]))
-
-            #create lists
-            ochl = []
-            iteration = list(newplotdata["Iteration"])
-            bid = list(newplotdata["bid"])
-            ask = list(newplotdata["ask"])
-
-            #create a list of tuples
-            for lower in range(upper):
-                append = iteration[lower], bid[lower], ask[lower], ask[lower], bid[lower]
-                ochl.append(append)
-            
-            #create candlestick plot from ochl list
-            self.plotter.addcandlestick(ochl, "candlestick")
-
-            #add lineplot to figure if specified
-            if self.xvariable!=None and self.yvariablelist!= None:
-                for index, yvariable in enumerate(self.yvariablelist):
-                    self.plotter.addlineplot(newplotdata[[self.xvariable,yvariable]],"lineplot"+str(index+1), color="#FFA500")
-            
\ No newline at end of file
+        #create the subplots for the graphtype
+        drawslice(self.plotter, newplotdata, self.graphtype, self.xvariable, self.yvariablelist)
@@ -0,0 +1,153 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+
+def commonuniforms(paths, iterations, seed=5000):
+    """Draws the random numbers shared by simulations with different parameters. Reusing the same
+    numbers (common random numbers) makes the difference between two simulations depend on the
+    parameters and not on the draws.
+
+    Args:
+        paths (int): number of simulated paths
+        iterations (int): Maximum number of iterations of a path
+        seed (int): Seed used to generate random numbers. Default 5000
+
+    Returns:
+        uniforms (numpy array): uniform numbers with shape (2, paths, iterations). The first are used to draw the trader type,
+                                and the second to draw the order of uninformed traders
+    """
+
+    return np.random.default_rng(seed).random((2, paths, iterations))
+
+
+def equilibriumperiods(uniforms, distribution=(0,1), decision="v_h", ratio=0.2, uninformed=0.5,
+                       startvalue=0.5, epsilon=10**-5):
+    """Simulates the Glosten-Milgrom model of gm_simulation for many paths at once, and returns the equilibrium period
+    of every path. A trader is informed if the first uniform number is below ratio, and an uninformed trader buys if
+    the second uniform number is below uninformed, so paths with the same numbers are coupled across parameters.
+
+    Args:
+        uniforms (numpy array): uniform numbers with shape (2, paths, iterations), see commonuniforms
+        distribution (tuple): upper and lower value for the security. Default (0,1)
+        decision (string): selecting the true value of the security. Default "v_h". options = ("v_h", "v_l")
+        ratio (float): Ratio of informed traders on the market. Default 0.2
+        uninformed (float): Chance to receieve buy order from uninformed trader. Default 0.5
+        startvalue (float): Dealer's start belief about the value of the security. Default 0.5
+        epsilon (float): Threshold parameter. Default 10**-5
+
+    Returns:
+        periods (numpy array): equilibrium period of every path. Paths which do not reach the threshold get the last iteration
+    """
+
+    #setting values
+    traderdraws, orderdraws = uniforms
+    paths, iterations = traderdraws.shape
+    v_l, v_h = distribution
+    v = v_h if decision=="v_h" else v_l
+    pi = ratio
+    beta_b = uninformed
+    beta_s = 1-beta_b
+
+    #state of every path
+    theta = np.full(paths, float(startvalue))
+    order = np.zeros(paths)
+    periods = np.full(paths, iterations-1)
+    active = np.ones(paths, dtype=bool)
+
+    for i in range(iterations):
+
+        #calculate expected value, markup/discount, ask/bid price and gap as in gm_simulation
+        mu = theta*v_h+(1-theta)*v_l
+        s_a = (pi*theta*(1-theta))/(pi*theta+(1-pi)*beta_b)*(v_h-v_l)
+        s_b = (pi*theta*(1-theta))/(pi*(1-theta)+(1-pi)*beta_s)*(v_h-v_l)
+        ask = mu+s_a
+        bid = mu-s_b
+
+        #save the equilibrium period of the paths where the threshold is reached
+        stopped = active & (ask-bid < epsilon)
+        periods[stopped] = i
+        active &= ~stopped
+        if not active.any():
+            break
+
+        #informed traders trade if the value is outside the quotes, and otherwise the previous order is kept
+        if v == v_h:
+            informedorder = np.where(v_h > ask, 1, order)
+        else:
+            informedorder = np.where(v_l < bid, -1, order)
+        order = np.where(traderdraws[:, i] < pi, informedorder, np.where(orderdraws[:, i] < beta_b, 1, -1))
+
+        #update beliefs depending on order type
+        buytheta = ((1+pi)*beta_b)/(pi*theta+(1-pi)*beta_b)*theta
+        selltheta = ((1-pi)*beta_b)/(pi*(1-theta)+(1-pi)*beta_b)*theta
+        theta = np.where(order == 1, buytheta, np.where(order == -1, selltheta, theta))
+
+    return periods
+
+
+def sensitivity(parameter, value, step=0.01, paths=1000, iterations=500, seed=5000, **parameters):
+    """Estimates the derivative of the mean equilibrium period with respect to a parameter with a central
+    finite difference. The simulations at value-step, value and value+step use common random numbers,
+    so the difference of each path has a much smaller variance than with independent draws.
+
+    Args:
+        parameter (string): name of the parameter. options = ("ratio", "uninformed", "startvalue")
+        value (float): value of the parameter
+        step (float): step of the finite difference. Default 0.01
+        paths (int): number of simulated paths. Default 1000
+        iterations (int): Maximum number of iterations of a path. Default 500
+        seed (int): Seed used to generate random numbers. Default 5000
+        **parameters: other parameters of equilibriumperiods, e.g. distribution or epsilon
+
+    Returns:
+        values (dictionary): the value, the mean equilibrium period and the derivative with their standard errors
+    """
+
+    uniforms = commonuniforms(paths, iterations, seed)
+    center = equilibriumperiods(uniforms, **dict(parameters, **{parameter: value}))
+    lower = equilibriumperiods(uniforms, **dict(parameters, **{parameter: value-step}))
+    upper = equilibriumperiods(uniforms, **dict(parameters, **{parameter: value+step}))
+
+    #the derivative of every path, and its mean and standard error over the paths
+    differences = (upper-lower)/(2*step)
+
+    return {parameter: value,
+            "Equilibrium period": float(center.mean()),
+            "Equilibrium period standard error": float(center.std(ddof=1)/np.sqrt(paths)),
+            "Derivative": float(differences.mean()),
+            "Derivative standard error": float(differences.std(ddof=1)/np.sqrt(paths))}
+
+
+def _sensitivitytask(task):
+    #Private function. Runs sensitivity for a single value. Runs in the worker processes of sensitivitygrid
+    parameter, value, step, paths, iterations, seed, parameters = task
+    return sensitivity(parameter, value, step, paths, iterations, seed, **parameters)
+
+
+def sensitivitygrid(parameter, grid, step=0.01, paths=1000, iterations=500, seed=5000, processes=None, **parameters):
+    """Runs sensitivity for every value in a grid in parallel worker processes. Every value uses the same seed,
+    so the estimates also use common random numbers across the grid, which gives a smooth curve.
+
+    Args:
+        parameter (string): name of the parameter. options = ("ratio", "uninformed", "startvalue")
+        grid (iterable of floats): values of the parameter
+        step (float): step of the finite difference. Default 0.01
+        paths (int): number of simulated paths. Default 1000
+        iterations (int): Maximum number of iterations of a path. Default 500
+        seed (int): Seed used to generate random numbers. Default 5000
+        processes (int): number of worker processes. Default None uses every cpu
+        **parameters: other parameters of equilibriumperiods, e.g. distribution or epsilon
+
+    Returns:
+        dataframe (pandas dataframe): a row for every value with the columns returned by sensitivity
+    """
+
+    tasks = [(parameter, float(value), step, paths, iterations, seed, parameters) for value in grid]
+
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(processes) as executor:
+        results = list(executor.map(_sensitivitytask, tasks))
+
+    return pd.DataFrame(results)